@@ -41,6 +41,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "lessons.context_processors.theme",
             ],
         },
     },
@@ -57,6 +58,17 @@ DATABASES = {
 
 AUTH_PASSWORD_VALIDATORS: list[dict] = []
 
+# Ограничение попыток входа (счетчики в кэше; для нескольких процессов нужен общий кэш, например Redis)
+LOGIN_THROTTLE_FREE_ATTEMPTS = 5
+LOGIN_THROTTLE_IP_FREE_ATTEMPTS = 20
+LOGIN_THROTTLE_BASE_SECONDS = 30
+LOGIN_THROTTLE_MAX_SECONDS = 60 * 60
+
+# Пул для вычисления хешей паролей: не больше N одновременно, остальные ждут или получают отказ
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_MAX_PENDING = 8
+PASSWORD_HASH_TIMEOUT = 10
+
 LANGUAGE_CODE = "ru-ru"
 TIME_ZONE = "Europe/Moscow"
 USE_I18N = True
@@ -66,6 +78,10 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"] if (BASE_DIR / "static").exists() else []
 
+# Загруженные картинки био и их уменьшенные копии (оригиналы наружу не отдаются)
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Telegram bot config (provided by user)
 # Токен открыт и доступен для продакшена
 TELEGRAM_BOT_TOKEN = os.environ.get(
@@ -73,11 +89,10 @@ TELEGRAM_BOT_TOKEN = os.environ.get(
     "8424624364:AAH-KTrV5T4hc6XwYFMljPASfa3NRt5Zrhs",
 )
 TELEGRAM_CHAT_ID = int(os.environ.get("TELEGRAM_CHAT_ID", "1965639178"))
+# Свой адрес Bot API, формат pyTelegramBotAPI: "http://127.0.0.1:8081/bot{0}/{1}" (пусто — api.telegram.org)
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "")
+# Секрет webhook'а: часть URL и заголовок X-Telegram-Bot-Api-Secret-Token (пусто — webhook выключен)
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
 
-# Проверка при запуске
-if not TELEGRAM_BOT_TOKEN:
-    print("[WARNING] TELEGRAM_BOT_TOKEN не установлен!")
-else:
-    print(f"[INFO] Telegram бот токен установлен: {TELEGRAM_BOT_TOKEN[:10]}...")
-
-
+# Бюджет времени импорта модулей проекта (мс, без Django и stdlib) для `manage.py check_import_time`
+IMPORT_TIME_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", "100"))
@@ -1,6 +1,19 @@
-from django.contrib import admin
+from collections import defaultdict
+from datetime import timedelta
 
-from .models import Teacher, Student, Lesson
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .agenda import invalidate_agenda
+from .events import publish_resync
+from .scheduling import describe, find_batch_conflicts, find_conflicts
+from .models import Teacher, Student, Lesson, ArchivedLesson, LessonRollup
 
 
 @admin.register(Teacher)
@@ -26,13 +39,200 @@ class StudentAdmin(admin.ModelAdmin):
     ordering = ("name",)
 
 
+ESTIMATE_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Для неотфильтрованного списка берет оценку числа строк из статистики СУБД вместо COUNT(*)"""
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            estimate = _estimated_row_count(self.object_list.model._meta.db_table)
+            if estimate is not None and estimate > ESTIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+def _estimated_row_count(table: str):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == "sqlite":
+            # Заполняется командой ANALYZE; первое число в stat любого полного индекса — количество строк
+            try:
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            except DatabaseError:
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None:
+        return None
+    try:
+        return int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+
+
+class LessonActionForm(ActionForm):
+    shift_minutes = forms.IntegerField(required=False, label="Сдвиг, минут")
+    new_teacher = forms.ModelChoiceField(Teacher.objects.all(), required=False, label="Новый учитель")
+
+
+def _touched_teachers(queryset):
+    return set(queryset.values_list("teacher_id", flat=True).distinct())
+
+
+class LessonAdminForm(forms.ModelForm):
+    class Meta:
+        model = Lesson
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        teacher = cleaned_data.get("teacher")
+        start_time = cleaned_data.get("start_time")
+        duration = cleaned_data.get("duration_minutes")
+        if teacher and start_time and duration:
+            conflicts = find_conflicts(teacher.id, start_time, duration, exclude_id=self.instance.pk)
+            if conflicts:
+                raise forms.ValidationError(f"Пересекается с занятием {describe(conflicts[0])}")
+        return cleaned_data
+
+
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
-    list_display = ("student", "teacher", "start_time", "notified_one_hour", "notified_five_minutes", "created_at")
-    list_filter = ("teacher", "notified_one_hour", "notified_five_minutes", "start_time")
+    form = LessonAdminForm
+    list_display = ("student", "teacher", "start_time", "duration_minutes", "notified_one_hour", "notified_five_minutes", "created_at")
+    list_select_related = ("student", "teacher")
+    list_filter = ("notified_one_hour", "notified_five_minutes", ("start_time", admin.DateFieldListFilter), "teacher")
     search_fields = ("student__name", "teacher__username")
     ordering = ("-start_time",)
-    date_hierarchy = "start_time"
     readonly_fields = ("created_at", "updated_at")
+    raw_id_fields = ("student", "teacher")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = LessonActionForm
+    actions = ["reset_notifications", "shift_start_time", "reassign_teacher"]
+
+    @admin.action(description="Сбросить отметки об уведомлениях")
+    def reset_notifications(self, request, queryset):
+        # Только отметки: updated_at не трогаем, иначе календари и кэш бота увидят новую версию без изменений
+        teachers = _touched_teachers(queryset)
+        updated = queryset.update(notified_one_hour=False, notified_five_minutes=False)
+        publish_resync(teachers)
+        self.message_user(request, f"Сброшено уведомлений у занятий: {updated}")
+
+    def _action_data(self, request) -> dict:
+        """Проверенные поля формы действия (Django уже проверил ее перед вызовом действия)"""
+        form = self.action_form(request.POST, auto_id=None)
+        form.fields["action"].choices = self.get_action_choices(request)
+        return form.cleaned_data if form.is_valid() else {}
+
+    @admin.action(description="Сдвинуть время занятий на N минут")
+    def shift_start_time(self, request, queryset):
+        minutes = self._action_data(request).get("shift_minutes")
+        if not minutes:
+            self.message_user(request, "Укажите сдвиг в минутах", level=messages.ERROR)
+            return
+        delta = timedelta(minutes=minutes)
+
+        # Сдвинутые копии проверяются на пересечения с остальными занятиями учителя;
+        # сами выбранные занятия на старых местах не учитываются
+        selected = list(queryset.select_related("student"))
+        selected_ids = [lesson.id for lesson in selected]
+        shifted_by_teacher = defaultdict(list)
+        for lesson in selected:
+            shifted_by_teacher[lesson.teacher_id].append(
+                Lesson(
+                    id=lesson.id,
+                    student=lesson.student,
+                    teacher_id=lesson.teacher_id,
+                    start_time=lesson.start_time + delta,
+                    duration_minutes=lesson.duration_minutes,
+                )
+            )
+        for teacher_id, shifted in shifted_by_teacher.items():
+            conflicts = find_batch_conflicts(teacher_id, shifted, exclude_ids=selected_ids)
+            if conflicts:
+                new, other = conflicts[0]
+                self.message_user(
+                    request,
+                    f"После сдвига занятие {describe(new)} пересечется с занятием {describe(other)}",
+                    level=messages.ERROR,
+                )
+                return
+
+        teachers = set(shifted_by_teacher)
+        updated = queryset.update(
+            start_time=F("start_time") + delta,
+            notified_one_hour=False,
+            notified_five_minutes=False,
+            updated_at=timezone.now(),
+        )
+        for teacher_id in teachers:
+            invalidate_agenda(teacher_id)
+        publish_resync(teachers)
+        self.message_user(request, f"Сдвинуто занятий: {updated}")
+
+    @admin.action(description="Передать учеников выбранных занятий другому учителю")
+    def reassign_teacher(self, request, queryset):
+        new_teacher = self._action_data(request).get("new_teacher")
+        if new_teacher is None:
+            self.message_user(request, "Выберите нового учителя", level=messages.ERROR)
+            return
+
+        # Ученик принадлежит учителю, поэтому передается целиком — со всеми своими занятиями;
+        # иначе у нового учителя остались бы занятия с чужими учениками
+        student_ids = set(queryset.values_list("student_id", flat=True).distinct())
+        moving = list(Student.objects.filter(id__in=student_ids).exclude(teacher=new_teacher))
+        clashes = Student.objects.filter(teacher=new_teacher, name__in=[student.name for student in moving])
+        clash_names = sorted(clashes.values_list("name", flat=True))
+        if clash_names:
+            self.message_user(
+                request,
+                f"У учителя {new_teacher} уже есть ученики с такими именами: {', '.join(clash_names)}",
+                level=messages.ERROR,
+            )
+            return
+
+        lessons = Lesson.objects.filter(student_id__in=student_ids).exclude(teacher=new_teacher)
+        conflicts = find_batch_conflicts(new_teacher.id, list(lessons.select_related("student")))
+        if conflicts:
+            new, other = conflicts[0]
+            self.message_user(
+                request,
+                f"Занятие {describe(new)} пересекается с занятием {describe(other)} у учителя {new_teacher}",
+                level=messages.ERROR,
+            )
+            return
+
+        teachers = _touched_teachers(lessons) | {student.teacher_id for student in moving} | {new_teacher.id}
+        now = timezone.now()
+        with transaction.atomic():
+            Student.objects.filter(id__in=[student.id for student in moving]).update(teacher=new_teacher, updated_at=now)
+            updated = lessons.update(teacher=new_teacher, updated_at=now)
+        for touched_id in teachers:
+            invalidate_agenda(touched_id)
+        publish_resync(teachers)
+        self.message_user(request, f"Передано учеников: {len(moving)}, занятий: {updated}")
+
+
+@admin.register(ArchivedLesson)
+class ArchivedLessonAdmin(admin.ModelAdmin):
+    list_display = ("student", "teacher", "start_time", "duration_minutes", "archived_at")
+    list_select_related = ("student", "teacher")
+    list_filter = ("teacher",)
+    search_fields = ("student__name", "teacher__username")
+    ordering = ("-start_time",)
+    readonly_fields = ("archived_at",)
 
 
+@admin.register(LessonRollup)
+class LessonRollupAdmin(admin.ModelAdmin):
+    list_display = ("teacher", "student", "period", "period_start", "lessons_count")
+    list_select_related = ("teacher", "student")
+    list_filter = ("teacher", "period")
+    ordering = ("teacher", "period", "-period_start")
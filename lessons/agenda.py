@@ -0,0 +1,96 @@
+from bisect import insort
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Lesson, Student, Teacher
+
+# Кэш расписания учителя для команд бота: отсортированный список ближайших занятий.
+# Строится одним запросом при первом обращении, дальше правится точечно по сигналам Lesson.
+# Кэш Django по умолчанию свой у каждого процесса (веб-воркеры, telegram_poll), поэтому каждое
+# изменение расписания увеличивает Teacher.agenda_stamp в БД, а запись кэша помнит, какому значению
+# она соответствует. Команда бота и так загружает учителя по chat id — сверка ничего не стоит.
+# Процесс, который сам меняет занятие, сдвигает отметку условным UPDATE (S -> S+1) и правит свою запись;
+# если отметку уже сдвинул кто-то другой, запись этого процесса устарела и просто удаляется.
+AGENDA_HORIZON = timedelta(days=14)
+# Если до конца закэшированного окна осталось меньше недели, /week уже не ответить — пересобираем
+AGENDA_MIN_AHEAD = timedelta(days=7)
+AGENDA_TIMEOUT = 24 * 60 * 60
+
+
+def _cache_key(teacher_id: int) -> str:
+    return f"agenda:{teacher_id}"
+
+
+def _entry(lesson, student_name: str) -> tuple:
+    return (lesson.start_time, lesson.id, student_name)
+
+
+def build_agenda(teacher, now=None) -> dict:
+    now = now or timezone.now()
+    horizon_end = now + AGENDA_HORIZON
+    rows = (
+        Lesson.objects.filter(teacher_id=teacher.id, start_time__gte=now, start_time__lt=horizon_end)
+        .order_by("start_time", "id")
+        .values_list("start_time", "id", "student__name")
+    )
+    # Отметка взята при загрузке учителя, до выборки: изменение между ними даст новую отметку
+    # и пересборку в следующий раз, а не устаревший кэш
+    agenda = {"stamp": teacher.agenda_stamp, "horizon_end": horizon_end, "entries": list(rows)}
+    cache.set(_cache_key(teacher.id), agenda, AGENDA_TIMEOUT)
+    return agenda
+
+
+def get_agenda(teacher, start, end) -> list[tuple]:
+    """Занятия учителя в интервале [start, end): список (start_time, lesson_id, имя ученика)"""
+    now = timezone.now()
+    agenda = cache.get(_cache_key(teacher.id))
+    if agenda is None or agenda["stamp"] != teacher.agenda_stamp or agenda["horizon_end"] - now < AGENDA_MIN_AHEAD:
+        agenda = build_agenda(teacher, now)
+    return [entry for entry in agenda["entries"] if start <= entry[0] < end]
+
+
+def _update_agenda(teacher_id: int, lesson_id: int, new_entry=None) -> None:
+    """Сдвинуть отметку учителя и поправить запись этого процесса"""
+    key = _cache_key(teacher_id)
+    agenda = cache.get(key)
+    if agenda is not None:
+        stamp = agenda["stamp"]
+        if Teacher.objects.filter(id=teacher_id, agenda_stamp=stamp).update(agenda_stamp=stamp + 1):
+            entries = [entry for entry in agenda["entries"] if entry[1] != lesson_id]
+            if new_entry is not None and new_entry[0] < agenda["horizon_end"]:
+                insort(entries, new_entry)
+            cache.set(key, {**agenda, "stamp": stamp + 1, "entries": entries}, AGENDA_TIMEOUT)
+            return
+    invalidate_agenda(teacher_id)
+
+
+def invalidate_agenda(teacher_id: int) -> None:
+    """Сбросить расписание учителя во всех процессах (после массовых изменений в обход сигналов)"""
+    Teacher.objects.filter(id=teacher_id).update(agenda_stamp=F("agenda_stamp") + 1)
+    cache.delete(_cache_key(teacher_id))
+
+
+@receiver(post_save, sender=Lesson)
+def _lesson_saved(sender, instance, update_fields=None, **kwargs):
+    # Отметки notifier'а о напоминаниях расписание не меняют
+    if update_fields and set(update_fields) <= {"notified_one_hour", "notified_five_minutes"}:
+        return
+    _update_agenda(instance.teacher_id, instance.id, _entry(instance, instance.student.name))
+
+
+@receiver(post_delete, sender=Lesson)
+def _lesson_deleted(sender, instance, **kwargs):
+    # Архивация удаляет уже начавшиеся занятия, а в расписании их и так нет
+    if instance.start_time >= timezone.now():
+        _update_agenda(instance.teacher_id, instance.id)
+
+
+@receiver(post_save, sender=Student)
+def _student_saved(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_agenda(instance.teacher_id)  # имя могло измениться
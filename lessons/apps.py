@@ -1,4 +1,25 @@
+import sys
+
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+# Подкоманды, которые ManagementUtility обрабатывает сама, без модуля команды
+BUILTIN_SUBCOMMANDS = {"help", "--help", "-h", "version", "--version"}
+
+
+def should_start_notifier(argv: list[str]) -> bool:
+    """Нужен ли фоновый планировщик этому процессу.
+
+    Смотрим на подкоманду, а не на имя скрипта: manage.py, django-admin и python -m django
+    запускают одни и те же команды. Из команд планировщик нужен только runserver; остальное
+    (веб-сервер WSGI, свои скрипты) подкомандой Django не является.
+    """
+    from django.core.management import get_commands
+
+    command = argv[1] if len(argv) > 1 else ""
+    if command in BUILTIN_SUBCOMMANDS or command in get_commands():
+        return command == "runserver"
+    return True
 
 
 class LessonsConfig(AppConfig):
@@ -6,9 +27,18 @@ class LessonsConfig(AppConfig):
     name = "lessons"
 
     def ready(self) -> None:
+        # Подписываем pub/sub дашборда и кэш расписания бота на сигналы моделей
+        from . import agenda, events  # noqa: F401
+        from .search import ensure_search_index_after_migrate
+
+        # SQLite теряет триггеры FTS5, когда миграция пересобирает таблицу учеников
+        post_migrate.connect(ensure_search_index_after_migrate, sender=self)
+
+        # Служебные команды (migrate, shell, check...) не трогают планировщик
+        if not should_start_notifier(sys.argv):
+            return
+
         # Start background notifier thread once
         from .notifier import start_notifier_once
 
         start_notifier_once()
-
-
@@ -0,0 +1,145 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ArchivedLesson, Lesson, LessonRollup
+from .scheduling import MAX_LESSON_DURATION, lesson_end
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def _period_starts(start_time):
+    """Начала недели и месяца (в локальном времени) для занятия"""
+    local_date = timezone.localtime(start_time).date()
+    week_start = local_date - timedelta(days=local_date.weekday())
+    month_start = local_date.replace(day=1)
+    return week_start, month_start
+
+
+def _rollup_keys(lesson):
+    """Все строки статистики, которые затрагивает одно занятие"""
+    week_start, month_start = _period_starts(lesson.start_time)
+    for student_id in (lesson.student_id, None):
+        yield (lesson.teacher_id, student_id, LessonRollup.PERIOD_WEEK, week_start)
+        yield (lesson.teacher_id, student_id, LessonRollup.PERIOD_MONTH, month_start)
+        yield (lesson.teacher_id, student_id, LessonRollup.PERIOD_TOTAL, None)
+
+
+def _add_to_rollup(lookup: dict, amount: int) -> None:
+    if LessonRollup.objects.filter(**lookup).update(lessons_count=F("lessons_count") + amount):
+        return
+    try:
+        # Точка сохранения: при гонке откатится только вставка, а не вся пачка
+        with transaction.atomic():
+            LessonRollup.objects.create(lessons_count=amount, **lookup)
+    except IntegrityError:
+        # Строку только что создал другой процесс — теперь она точно есть
+        LessonRollup.objects.filter(**lookup).update(lessons_count=F("lessons_count") + amount)
+
+
+def _apply_rollups(counts: Counter) -> None:
+    """Прибавить счетчики к строкам статистики, создавая недостающие"""
+    for (teacher_id, student_id, period, period_start), amount in counts.items():
+        lookup = {
+            "teacher_id": teacher_id,
+            "student_id": student_id,
+            "period": period,
+            "period_start": period_start,
+        }
+        _add_to_rollup(lookup, amount)
+
+
+def _ended_recently(now) -> list[int]:
+    """id занятий, начавшихся за последние MAX_LESSON_DURATION и уже закончившихся"""
+    recent = Lesson.objects.filter(start_time__gte=now - MAX_LESSON_DURATION, start_time__lt=now).values_list(
+        "id", "start_time", "duration_minutes"
+    )
+    return [lesson_id for lesson_id, start_time, duration in recent if lesson_end(start_time, duration) <= now]
+
+
+def archive_batch(now=None, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Перенести одну пачку закончившихся занятий в архив. Возвращает число перенесенных.
+
+    Идущее занятие остается в Lesson до конца — иначе проверка пересечений его бы не видела.
+    Занятие не длиннее MAX_LESSON_DURATION, поэтому все начавшиеся раньше now - MAX_LESSON_DURATION
+    уже закончились (диапазон по индексу), а короткое окно перед now проверяется поштучно.
+    """
+    now = now or timezone.now()
+    ended = Q(start_time__lt=now - MAX_LESSON_DURATION) | Q(id__in=_ended_recently(now))
+    with transaction.atomic():
+        # Несколько notifier'ов (процессов) не должны взять одну пачку: строки блокируются,
+        # а уже заблокированные другими пропускаются (на SQLite запись и так одна)
+        batch = list(
+            Lesson.objects.select_for_update(skip_locked=True)
+            .filter(ended)
+            .order_by("start_time")
+            .only("id", "student_id", "teacher_id", "start_time", "duration_minutes")[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        store_archived(
+            [
+                ArchivedLesson(
+                    student_id=l.student_id,
+                    teacher_id=l.teacher_id,
+                    start_time=l.start_time,
+                    duration_minutes=l.duration_minutes,
+                )
+                for l in batch
+            ],
+            batch_size=batch_size,
+        )
+        Lesson.objects.filter(id__in=[l.id for l in batch]).delete()
+    return len(batch)
+
+
+def store_archived(archived: list, batch_size: int = ARCHIVE_BATCH_SIZE) -> None:
+    """Записать занятия в архив и прибавить их к статистике (вызывать внутри транзакции)"""
+    ArchivedLesson.objects.bulk_create(archived, batch_size=batch_size)
+    counts = Counter()
+    for lesson in archived:
+        counts.update(_rollup_keys(lesson))
+    _apply_rollups(counts)
+
+
+def compact_lessons(now=None, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Перенести в архив все закончившиеся занятия пачками по batch_size"""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        moved = archive_batch(now, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+def get_rollup_stats(teacher, today=None) -> dict:
+    """Статистика учителя за текущую неделю, месяц и всего — только чтение готовых строк"""
+    today = today or timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+
+    rows = LessonRollup.objects.filter(teacher=teacher).filter(
+        period_start__in=[week_start, month_start]
+    ) | LessonRollup.objects.filter(teacher=teacher, period=LessonRollup.PERIOD_TOTAL)
+
+    wanted = {
+        (LessonRollup.PERIOD_WEEK, week_start): "week",
+        (LessonRollup.PERIOD_MONTH, month_start): "month",
+        (LessonRollup.PERIOD_TOTAL, None): "total",
+    }
+    teacher_stats = {"week": 0, "month": 0, "total": 0}
+    student_stats = {}
+    for row in rows:
+        key = wanted.get((row.period, row.period_start))
+        if key is None:
+            continue
+        if row.student_id is None:
+            teacher_stats[key] = row.lessons_count
+        else:
+            student_stats.setdefault(row.student_id, {"week": 0, "month": 0, "total": 0})[key] = row.lessons_count
+    return {"teacher": teacher_stats, "students": student_stats}
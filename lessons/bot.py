@@ -0,0 +1,98 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .agenda import get_agenda
+from .models import Teacher
+
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+HELP_TEXT = (
+    "Команды:\n"
+    "/today — занятия на сегодня\n"
+    "/week — занятия на 7 дней\n"
+    "/next — ближайшее занятие"
+)
+
+
+def _local_day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def _format_entries(entries, with_date: bool) -> str:
+    lines = []
+    current_day = None
+    for start_time, _lesson_id, student_name in entries:
+        local = timezone.localtime(start_time)
+        if with_date and local.date() != current_day:
+            current_day = local.date()
+            lines.append(f"\n{WEEKDAYS[current_day.weekday()]} {current_day.strftime('%d.%m')}")
+        lines.append(f"{local.strftime('%H:%M')} — {student_name}")
+    return "\n".join(lines).strip()
+
+
+def cmd_today(teacher) -> str:
+    now = timezone.now()
+    end = _local_day_start(timezone.localdate() + timedelta(days=1))
+    entries = get_agenda(teacher, now, end)
+    if not entries:
+        return "Сегодня занятий больше нет"
+    return "Сегодня:\n" + _format_entries(entries, with_date=False)
+
+
+def cmd_week(teacher) -> str:
+    now = timezone.now()
+    end = _local_day_start(timezone.localdate() + timedelta(days=7))
+    entries = get_agenda(teacher, now, end)
+    if not entries:
+        return "На ближайшие 7 дней занятий нет"
+    return "Занятия на неделю:\n" + _format_entries(entries, with_date=True)
+
+
+def cmd_next(teacher) -> str:
+    now = timezone.now()
+    entries = get_agenda(teacher, now, now + timedelta(days=7))
+    if not entries:
+        return "На ближайшие 7 дней занятий нет"
+    start_time, _lesson_id, student_name = entries[0]
+    local = timezone.localtime(start_time)
+    return f"Следующее занятие: {local.strftime('%d.%m %H:%M')} — {student_name}"
+
+
+COMMANDS = {
+    "/today": cmd_today,
+    "/week": cmd_week,
+    "/next": cmd_next,
+}
+
+
+def reply_to_command(chat_id, text: str) -> str | None:
+    """Текст ответа на команду (None — сообщение не команда)"""
+    if not text or not text.startswith("/"):
+        return None
+    # "/today@bot_name args" -> "/today"
+    command = text.split()[0].split("@")[0].lower()
+
+    teacher = Teacher.objects.filter(telegram_chat_id=str(chat_id)).first()
+    if teacher is None:
+        return f"Этот чат не привязан к учителю. Укажите Chat ID {chat_id} в настройках аккаунта."
+    if command == "/start" or command == "/help":
+        return f"Здравствуйте, {teacher.username}!\n\n{HELP_TEXT}"
+    handler = COMMANDS.get(command)
+    if handler is None:
+        return f"Неизвестная команда.\n\n{HELP_TEXT}"
+    return handler(teacher)
+
+
+def handle_update(update: dict) -> tuple | None:
+    """Разобрать Update от Bot API (словарь из webhook или getUpdates): (chat_id, текст ответа) или None"""
+    message = update.get("message") or update.get("edited_message")
+    if not message:
+        return None
+    chat_id = message.get("chat", {}).get("id")
+    if chat_id is None:
+        return None
+    reply = reply_to_command(chat_id, message.get("text", ""))
+    if reply is None:
+        return None
+    return chat_id, reply
@@ -0,0 +1,78 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Max
+
+from .models import Lesson, Student
+
+# iCalendar-подписка учителя. В Lesson лежат только еще не заархивированные (предстоящие и идущие) занятия,
+# поэтому лента — это все занятия учителя. Версия ленты — последнее updated_at занятий/учеников
+# плюс число занятий (удаление не меняет Max(updated_at), но меняет количество). Отметки notifier'а
+# о напоминаниях в ленту не попадают и updated_at не меняют; имя учителя добавляется в ETag во view.
+CHUNK_SIZE = 1000
+
+
+def feed_version(teacher_id: int) -> tuple:
+    """(последнее изменение, число занятий) — два агрегата по индексам, без построения ленты"""
+    lessons = Lesson.objects.filter(teacher_id=teacher_id).aggregate(last=Max("updated_at"), count=Count("id"))
+    students_last = Student.objects.filter(teacher_id=teacher_id).aggregate(last=Max("updated_at"))["last"]
+    last_modified = max(filter(None, [lessons["last"], students_last]), default=None)
+    return last_modified, lessons["count"]
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Перенос строк длиннее 75 байт (RFC 5545, 3.1)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    current = ""
+    limit = 75
+    for char in line:
+        if len((current + char).encode("utf-8")) > limit:
+            parts.append(current)
+            current = ""
+            limit = 74  # продолжение начинается с пробела
+        current += char
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(value) -> str:
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def iter_calendar(teacher):
+    """Строки .ics; занятия читаются кусками, лента не собирается в памяти целиком"""
+    yield _fold("BEGIN:VCALENDAR")
+    yield _fold("VERSION:2.0")
+    yield _fold("PRODID:-//LearnTimeCheck//RU")
+    yield _fold("CALSCALE:GREGORIAN")
+    yield _fold("METHOD:PUBLISH")
+    yield _fold(f"X-WR-CALNAME:{_escape(f'LearnTimeCheck — {teacher.username}')}")
+
+    lessons = (
+        Lesson.objects.filter(teacher=teacher)
+        .order_by("start_time")
+        .values_list("id", "start_time", "duration_minutes", "updated_at", "student__name")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for lesson_id, start_time, duration, updated_at, student_name in lessons:
+        yield _fold("BEGIN:VEVENT")
+        yield _fold(f"UID:lesson-{lesson_id}@learntimecheck")
+        yield _fold(f"DTSTAMP:{_utc(updated_at)}")
+        yield _fold(f"LAST-MODIFIED:{_utc(updated_at)}")
+        yield _fold(f"DTSTART:{_utc(start_time)}")
+        yield _fold(f"DTEND:{_utc(start_time + timedelta(minutes=duration))}")
+        yield _fold(f"SUMMARY:{_escape(f'Занятие: {student_name}')}")
+        yield _fold("END:VEVENT")
+    yield _fold("END:VCALENDAR")
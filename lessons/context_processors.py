@@ -0,0 +1,7 @@
+from .themes import theme_css_url
+from .views import get_theme
+
+
+def theme(request):
+    """CSS активной темы для base.html"""
+    return {"theme_css_url": theme_css_url(get_theme(request))}
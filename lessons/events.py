@@ -0,0 +1,113 @@
+import json
+import queue
+import threading
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Lesson
+
+# Внутрипроцессный pub/sub для SSE-дашборда: события по учителю раздаются подписчикам-потокам.
+# Работает в рамках одного процесса (runserver с фоновым notifier'ом).
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_subscribers: dict[int, set[queue.Queue]] = {}
+_lock = threading.Lock()
+
+
+def subscribe(teacher_id: int) -> queue.Queue:
+    q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _lock:
+        _subscribers.setdefault(teacher_id, set()).add(q)
+    return q
+
+
+def unsubscribe(teacher_id: int, q: queue.Queue) -> None:
+    with _lock:
+        subscribers = _subscribers.get(teacher_id)
+        if subscribers is not None:
+            subscribers.discard(q)
+            if not subscribers:
+                del _subscribers[teacher_id]
+
+
+def has_subscribers(teacher_id: int) -> bool:
+    return teacher_id in _subscribers
+
+
+def publish(teacher_id: int, event: str, data: dict) -> None:
+    """Разослать событие всем подпискам учителя.
+
+    Медленный подписчик не тормозит отправителя: если его очередь переполнена, накопленное
+    выбрасывается и вместо него уходит событие resync — клиент заново загрузит снимок.
+    """
+    message = format_sse(event, data)
+    with _lock:
+        subscribers = list(_subscribers.get(teacher_id, ()))
+    for q in subscribers:
+        try:
+            q.put_nowait(message)
+        except queue.Full:
+            _overflow(q)
+
+
+def publish_resync(teacher_ids) -> None:
+    """Попросить дашборды учителей заново загрузить снимок — после массовых изменений без сигналов
+    (queryset.update, bulk_create), по которым отдельные события не отправить"""
+    for teacher_id in teacher_ids:
+        if has_subscribers(teacher_id):
+            publish(teacher_id, "resync", {})
+
+
+def _overflow(q: queue.Queue) -> None:
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        q.put_nowait(RESYNC_MESSAGE)
+    except queue.Full:
+        pass  # очередь успел заполнить другой поток — он же и положит resync
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+RESYNC_MESSAGE = format_sse("resync", {})
+
+
+def lesson_payload(lesson) -> dict:
+    return {
+        "id": lesson.id,
+        "student_id": lesson.student_id,
+        "student": lesson.student.name,
+        "start_time": lesson.start_time.isoformat(),
+        "start_display": timezone.localtime(lesson.start_time).strftime("%Y-%m-%d %H:%M"),
+        "notified_one_hour": lesson.notified_one_hour,
+        "notified_five_minutes": lesson.notified_five_minutes,
+    }
+
+
+_REMINDER_FIELDS = {"notified_one_hour", "notified_five_minutes"}
+
+
+@receiver(post_save, sender=Lesson)
+def _lesson_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not has_subscribers(instance.teacher_id):
+        return
+    if created:
+        event = "lesson_added"
+    elif update_fields and _REMINDER_FIELDS & set(update_fields):
+        event = "reminder_sent"  # сохранение из notifier'а
+    else:
+        event = "lesson_updated"
+    publish(instance.teacher_id, event, lesson_payload(instance))
+
+
+@receiver(post_delete, sender=Lesson)
+def _lesson_deleted(sender, instance, **kwargs):
+    if has_subscribers(instance.teacher_id):
+        publish(instance.teacher_id, "lesson_removed", {"id": instance.id})
@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Teacher, Student, Lesson
+from .models import Teacher, Student, Lesson, BioImage
 
 
 class LoginForm(forms.Form):
@@ -26,13 +26,40 @@ class BioForm(forms.ModelForm):
         }
 
 
+class BioImageForm(forms.ModelForm):
+    MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+    class Meta:
+        model = BioImage
+        fields = ["image"]
+        widgets = {
+            "image": forms.ClearableFileInput(attrs={"accept": "image/*"}),
+        }
+
+    def clean_image(self):
+        image = self.cleaned_data.get("image")
+        if image and image.size > self.MAX_UPLOAD_SIZE:
+            raise forms.ValidationError("Файл слишком большой (максимум 10 МБ)")
+        return image
+
+
 class LessonForm(forms.ModelForm):
+    repeat_weeks = forms.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=52,
+        initial=0,
+        label="Повторять недель",
+        widget=forms.NumberInput(attrs={"min": 0, "max": 52}),
+    )
+
     class Meta:
         model = Lesson
-        fields = ["student", "start_time"]
+        fields = ["student", "start_time", "duration_minutes"]
         widgets = {
             "student": forms.Select(attrs={'class': 'form-select'}),
             "start_time": forms.DateTimeInput(attrs={"type": "datetime-local"}),
+            "duration_minutes": forms.NumberInput(attrs={"min": 1, "max": Lesson.MAX_DURATION_MINUTES, "step": 5}),
         }
 
 
@@ -71,3 +98,11 @@ class PasswordChangeForm(forms.Form):
                 raise forms.ValidationError("Пароли не совпадают!")
 
         return cleaned_data
+
+
+class DataImportForm(forms.Form):
+    """Загрузка учеников и занятий из JSON Lines или CSV"""
+    file = forms.FileField(
+        label="Файл",
+        widget=forms.ClearableFileInput(attrs={"accept": ".jsonl,.json,.csv"}),
+    )
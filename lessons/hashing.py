@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+
+# Проверка и вычисление хешей паролей (PBKDF2) на отдельном ограниченном пуле потоков:
+# одновременно считается не больше PASSWORD_HASH_WORKERS хешей, в очереди — не больше
+# PASSWORD_HASH_MAX_PENDING. Лишние запросы сразу получают PasswordHasherBusy,
+# и волна логинов не занимает все воркеры.
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+_executor = None
+_slots = None
+_init_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _init_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hasher",
+            )
+            _slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    return _executor, _slots
+
+
+def run_hashing(func, *args):
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = executor.submit(func, *args)
+        try:
+            return future.result(timeout=settings.PASSWORD_HASH_TIMEOUT)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy()
+    finally:
+        slots.release()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+# Варианты картинок био: максимальный размер стороны в пикселях.
+# pdf — под ширину страницы A4 (~450pt) при ~200 dpi
+VARIANTS = {
+    "thumb": (240, 240),
+    "web": (1200, 1200),
+    "pdf": (1250, 1250),
+}
+JPEG_QUALITY = 82
+CACHE_DIR = "bio_cache"
+
+
+def variant_path(bio_image, variant: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / CACHE_DIR / str(bio_image.id) / f"{variant}.jpg"
+
+
+def get_variant(bio_image, variant: str) -> Path:
+    """Путь к уменьшенной копии; при первом запросе копия создается и кладется в кэш на диске.
+
+    FileNotFoundError — если пропал оригинал.
+    """
+    path = variant_path(bio_image, variant)
+    if path.exists():
+        return path
+
+    # Pillow нужен только здесь, не грузим его при старте воркера
+    from PIL import Image, ImageOps
+
+    size = VARIANTS[variant]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(bio_image.image.path) as src:
+        # Для JPEG декодируем сразу в уменьшенном масштабе
+        src.draft("RGB", size)
+        img = ImageOps.exif_transpose(src)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        else:
+            img = img.convert("RGB")
+        img.thumbnail(size, Image.LANCZOS)
+
+        # Пишем в свой временный файл и атомарно подменяем — параллельные запросы (и потоки,
+        # и процессы) не увидят половину файла и не помешают друг другу
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False) as tmp:
+            try:
+                img.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+        os.replace(tmp.name, path)
+    return path
+
+
+def variant_size(path: Path) -> tuple[int, int]:
+    """Размер готовой копии (читается только заголовок файла)"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return img.size
+
+
+def delete_variants(bio_image) -> None:
+    shutil.rmtree(variant_path(bio_image, "thumb").parent, ignore_errors=True)
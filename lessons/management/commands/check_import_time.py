@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Модули, которые нужны только отдельным маршрутам (PDF, био, бот) и не должны грузиться при старте
+LAZY_MODULES = ("reportlab", "markdown", "PIL", "telebot")
+
+# Пакеты проекта: бюджет считается по их доле, а не по общему времени вместе с Django и site
+APP_PACKAGES = ("lessons", "learn_time_check")
+
+# То, что делает воркер при холодном старте: настройка Django и загрузка URLConf.
+# Django грузит приложения, модели и настройки через importlib.import_module, а такие импорты
+# `-X importtime` не видит — подменяем его на __import__, чтобы они попали в отчет.
+STARTUP_CODE = """
+import importlib, importlib.util, sys
+
+def _import_module(name, package=None):
+    if name.startswith("."):
+        name = importlib.util.resolve_name(name, package)
+    __import__(name)
+    return sys.modules[name]
+
+importlib.import_module = _import_module
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str, int]]:
+    """Разобрать вывод `-X importtime`: список (глубина, модуль, накопленное время в мкс).
+
+    Вложенные импорты сдвинуты пробелами и печатаются раньше родителя; их время уже входит в него.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # строка заголовка
+        depth = (len(parts[2]) - len(parts[2].lstrip()) - 1) // 2
+        entries.append((depth, parts[2].strip(), int(parts[1])))
+    return entries
+
+
+def _is_app_module(name: str) -> bool:
+    return name.split(".")[0] in APP_PACKAGES
+
+
+def app_import_time(entries) -> dict:
+    """Время импорта модулей проекта: {модуль: мкс} только для самых внешних модулей проекта.
+
+    Вложенный модуль проекта не считается второй раз, а сторонние библиотеки, которые
+    впервые подтянул код проекта, входят в его время.
+    """
+    result = {}
+    app_depths = []  # глубины предков-модулей проекта на текущем пути
+    # В обратном порядке вывод идет от родителя к детям
+    for depth, name, cumulative in reversed(entries):
+        while app_depths and app_depths[-1] >= depth:
+            app_depths.pop()
+        if _is_app_module(name):
+            if not app_depths:
+                result[name] = cumulative
+            app_depths.append(depth)
+    return result
+
+
+class Command(BaseCommand):
+    help = "Проверить время импорта при старте воркера (python -X importtime)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget-ms",
+            type=int,
+            default=settings.IMPORT_TIME_BUDGET_MS,
+            help="Допустимое время импорта модулей проекта в миллисекундах",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Сколько раз запускать; берется самый быстрый запуск, чтобы не ловить шум",
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "learn_time_check.settings"))
+        best = None
+        for _ in range(max(options["runs"], 1)):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f"Не удалось запустить приложение:\n{result.stderr[-2000:]}")
+
+            entries = parse_importtime(result.stderr)
+            app_modules = app_import_time(entries)
+            app_ms = sum(app_modules.values()) / 1000
+            if best is None or app_ms < best[0]:
+                best = (app_ms, entries, app_modules)
+        app_ms, entries, app_modules = best
+        total_ms = sum(cumulative for depth, _name, cumulative in entries if depth == 0) / 1000
+
+        slowest = sorted(app_modules.items(), key=lambda item: item[1], reverse=True)[:10]
+        for name, us in slowest:
+            self.stdout.write(f"{us / 1000:8.1f} ms  {name}")
+        self.stdout.write(f"Всего при старте: {total_ms:.1f} ms (вместе с Django и стандартной библиотекой)")
+        self.stdout.write(f"Модули проекта: {app_ms:.1f} ms (бюджет {options['budget_ms']} ms)")
+
+        eager = sorted({name.split(".")[0] for _depth, name, _cumulative in entries} & set(LAZY_MODULES))
+        if eager:
+            raise CommandError(f"При старте импортируются тяжелые модули: {', '.join(eager)}")
+        if app_ms > options["budget_ms"]:
+            raise CommandError(f"Импорт модулей проекта {app_ms:.1f} ms превышает бюджет {options['budget_ms']} ms")
+        self.stdout.write(self.style.SUCCESS("Время импорта в пределах бюджета"))
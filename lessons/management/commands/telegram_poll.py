@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from lessons.bot import handle_update
+from lessons.notifier import _configure_api, _send_message_to_chat
+
+POLL_TIMEOUT = 25
+
+
+class Command(BaseCommand):
+    help = "Отвечать на команды бота через long polling (getUpdates), если webhook не настроен"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Обработать одну пачку обновлений и выйти")
+
+    def handle(self, *args, **options):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError("TELEGRAM_BOT_TOKEN не установлен!")
+
+        from telebot import apihelper
+
+        _configure_api()
+        # getUpdates не работает, пока у бота включен webhook
+        apihelper.delete_webhook(settings.TELEGRAM_BOT_TOKEN)
+
+        self.stdout.write("[BOT] Жду команды (long polling)...")
+        # С --once не ждем новых обновлений, только забираем накопившиеся
+        poll_timeout = 1 if options["once"] else POLL_TIMEOUT
+        offset = None
+        while True:
+            try:
+                updates = apihelper.get_updates(
+                    settings.TELEGRAM_BOT_TOKEN,
+                    offset=offset,
+                    timeout=poll_timeout,
+                    long_polling_timeout=poll_timeout,
+                )
+            except Exception as e:
+                self.stderr.write(f"[BOT ERROR] getUpdates: {type(e).__name__}: {e}")
+                if options["once"]:
+                    return
+                time.sleep(5)
+                continue
+
+            for update in updates:
+                offset = update["update_id"] + 1
+                close_old_connections()
+                try:
+                    result = handle_update(update)
+                    if result is not None:
+                        chat_id, reply = result
+                        _send_message_to_chat(reply, str(chat_id))
+                except Exception as e:
+                    self.stderr.write(f"[BOT ERROR] Ошибка обработки update {update['update_id']}: {type(e).__name__}: {e}")
+
+            if options["once"]:
+                if offset is not None:
+                    # Подтверждаем обработанные, иначе Bot API вернет их при следующем запуске
+                    apihelper.get_updates(
+                        settings.TELEGRAM_BOT_TOKEN, offset=offset, timeout=poll_timeout, long_polling_timeout=poll_timeout
+                    )
+                return
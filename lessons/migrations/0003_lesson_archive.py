@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0002_alter_student_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Неделя'), ('month', 'Месяц'), ('total', 'Всего')], max_length=5)),
+                ('period_start', models.DateField(blank=True, null=True)),
+                ('lessons_count', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='lessons.student')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='lessons.teacher')),
+            ],
+            options={
+                'ordering': ['teacher', 'period', '-period_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedLesson',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_lessons', to='lessons.student')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_lessons', to='lessons.teacher')),
+            ],
+            options={
+                'ordering': ['-start_time'],
+                'indexes': [models.Index(fields=['teacher', 'start_time'], name='lessons_arc_teacher_c60ba3_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='lessonrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('period_start__isnull', False), ('student__isnull', False)), fields=('teacher', 'student', 'period', 'period_start'), name='rollup_unique_student_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='lessonrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('period_start__isnull', False), ('student__isnull', True)), fields=('teacher', 'period', 'period_start'), name='rollup_unique_teacher_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='lessonrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('period_start__isnull', True), ('student__isnull', False)), fields=('teacher', 'student', 'period'), name='rollup_unique_student_total'),
+        ),
+        migrations.AddConstraint(
+            model_name='lessonrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('period_start__isnull', True), ('student__isnull', True)), fields=('teacher', 'period'), name='rollup_unique_teacher_total'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE lessons_student_fts USING fts5("
+    "name, bio, content='lessons_student', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER lessons_student_fts_ai AFTER INSERT ON lessons_student BEGIN "
+    "INSERT INTO lessons_student_fts(rowid, name, bio) VALUES (new.id, new.name, new.bio); END",
+    "CREATE TRIGGER lessons_student_fts_ad AFTER DELETE ON lessons_student BEGIN "
+    "INSERT INTO lessons_student_fts(lessons_student_fts, rowid, name, bio) "
+    "VALUES ('delete', old.id, old.name, old.bio); END",
+    "CREATE TRIGGER lessons_student_fts_au AFTER UPDATE OF name, bio ON lessons_student BEGIN "
+    "INSERT INTO lessons_student_fts(lessons_student_fts, rowid, name, bio) "
+    "VALUES ('delete', old.id, old.name, old.bio); "
+    "INSERT INTO lessons_student_fts(rowid, name, bio) VALUES (new.id, new.name, new.bio); END",
+    # Индексируем уже существующих учеников
+    "INSERT INTO lessons_student_fts(lessons_student_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS lessons_student_fts_au",
+    "DROP TRIGGER IF EXISTS lessons_student_fts_ad",
+    "DROP TRIGGER IF EXISTS lessons_student_fts_ai",
+    "DROP TABLE IF EXISTS lessons_student_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX lessons_student_fts_idx ON lessons_student USING GIN ("
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(bio, '')))",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS lessons_student_fts_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0003_lesson_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0004_student_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BioImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(height_field='height', upload_to='bio_images/%Y/%m/', width_field='width')),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='lessons.student')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0005_bio_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['teacher', 'start_time'], name='lessons_les_teacher_71a5ea_idx'),
+        ),
+    ]
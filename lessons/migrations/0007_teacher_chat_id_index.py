@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0006_lesson_teacher_start_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='teacher',
+            name='telegram_chat_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Telegram Chat ID для уведомлений', max_length=50),
+        ),
+    ]
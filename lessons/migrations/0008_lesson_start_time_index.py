@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0007_teacher_chat_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['start_time'], name='lessons_les_start_t_1fb529_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0009_lesson_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='calendar_token',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['teacher', 'updated_at'], name='lessons_les_teacher_79943e_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0010_teacher_calendar_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedlesson',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=60),
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+
+def _fold(expr):
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _values(row):
+    return f"{row}.id, {_fold(f'{row}.name')}, {_fold(f'{row}.bio')}, 't' || {row}.teacher_id"
+
+
+DROP_SQLITE = [
+    "DROP TRIGGER IF EXISTS lessons_student_fts_au",
+    "DROP TRIGGER IF EXISTS lessons_student_fts_ad",
+    "DROP TRIGGER IF EXISTS lessons_student_fts_ai",
+    "DROP TABLE IF EXISTS lessons_student_fts",
+]
+
+# Таблица без копии текста (content=''): в индекс идет текст с ё -> е, а 'rebuild' из lessons_student
+# вернул бы исходный текст. prefix='2 3' — индексы двух- и трехбуквенных префиксов.
+SQLITE_FORWARD = DROP_SQLITE + [
+    "CREATE VIRTUAL TABLE lessons_student_fts USING fts5("
+    "name, bio, teacher, content='', prefix='2 3', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER lessons_student_fts_ai AFTER INSERT ON lessons_student BEGIN "
+    f"INSERT INTO lessons_student_fts(rowid, name, bio, teacher) VALUES ({_values('new')}); END",
+    "CREATE TRIGGER lessons_student_fts_ad AFTER DELETE ON lessons_student BEGIN "
+    f"INSERT INTO lessons_student_fts(lessons_student_fts, rowid, name, bio, teacher) VALUES ('delete', {_values('old')}); END",
+    "CREATE TRIGGER lessons_student_fts_au AFTER UPDATE OF name, bio, teacher_id ON lessons_student BEGIN "
+    f"INSERT INTO lessons_student_fts(lessons_student_fts, rowid, name, bio, teacher) VALUES ('delete', {_values('old')}); "
+    f"INSERT INTO lessons_student_fts(rowid, name, bio, teacher) VALUES ({_values('new')}); END",
+    f"INSERT INTO lessons_student_fts(rowid, name, bio, teacher) SELECT {_values('s')} FROM lessons_student s",
+]
+
+# Обратно — схема из 0004_student_search
+SQLITE_REVERSE = DROP_SQLITE + [
+    "CREATE VIRTUAL TABLE lessons_student_fts USING fts5("
+    "name, bio, content='lessons_student', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER lessons_student_fts_ai AFTER INSERT ON lessons_student BEGIN "
+    "INSERT INTO lessons_student_fts(rowid, name, bio) VALUES (new.id, new.name, new.bio); END",
+    "CREATE TRIGGER lessons_student_fts_ad AFTER DELETE ON lessons_student BEGIN "
+    "INSERT INTO lessons_student_fts(lessons_student_fts, rowid, name, bio) "
+    "VALUES ('delete', old.id, old.name, old.bio); END",
+    "CREATE TRIGGER lessons_student_fts_au AFTER UPDATE OF name, bio ON lessons_student BEGIN "
+    "INSERT INTO lessons_student_fts(lessons_student_fts, rowid, name, bio) "
+    "VALUES ('delete', old.id, old.name, old.bio); "
+    "INSERT INTO lessons_student_fts(rowid, name, bio) VALUES (new.id, new.name, new.bio); END",
+    "INSERT INTO lessons_student_fts(lessons_student_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_FORWARD = [
+    "DROP INDEX IF EXISTS lessons_student_fts_idx",
+    "CREATE INDEX lessons_student_fts_idx ON lessons_student USING GIN ("
+    "to_tsvector('simple', translate(coalesce(name, '') || ' ' || coalesce(bio, ''), 'ёЁ', 'еЕ')))",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS lessons_student_fts_idx",
+    "CREATE INDEX lessons_student_fts_idx ON lessons_student USING GIN ("
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(bio, '')))",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0011_archivedlesson_duration'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            _run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0012_student_search_prefix'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='agenda_stamp',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,17 +1,28 @@
+import secrets
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import make_password, check_password, identify_hasher
 
 
 class Teacher(models.Model):
     username = models.CharField(max_length=100, unique=True)
     password = models.CharField(max_length=255)  # Хранится как хеш
-    telegram_chat_id = models.CharField(max_length=50, blank=True, help_text="Telegram Chat ID для уведомлений")
+    telegram_chat_id = models.CharField(max_length=50, blank=True, db_index=True, help_text="Telegram Chat ID для уведомлений")
+    # Секрет в URL подписки на календарь (.ics); создается по запросу
+    calendar_token = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Растет при каждом изменении расписания; по нему процессы сверяют свой кэш расписания бота (agenda.py)
+    agenda_stamp = models.BigIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["username"]
 
+    password_upgraded = False
+
     def __str__(self):
         return self.username
 
@@ -19,12 +30,35 @@ class Teacher(models.Model):
         self.password = make_password(raw_password)
 
     def check_password(self, raw_password):
-        return check_password(raw_password, self.password)
+        """Проверить пароль; если хеш устарел (сменился алгоритм или число итераций), пересчитать его.
+
+        Новый хеш только присваивается — сохранить его должен вызывающий код (см. password_upgraded),
+        чтобы проверку можно было выполнять в отдельном потоке без обращений к БД.
+        """
+        def upgrade(raw):
+            self.password = make_password(raw)
+            self.password_upgraded = True
+
+        return check_password(raw_password, self.password, upgrade)
+
+    def regenerate_calendar_token(self):
+        self.calendar_token = secrets.token_urlsafe(32)
+        self.save(update_fields=["calendar_token"])
 
     def save(self, *args, **kwargs):
-        # Если пароль не захеширован, хешируем его
-        if self.password and not self.password.startswith('pbkdf2_'):
-            self.password = make_password(self.password)
+        # Если пароль не захеширован (ни один из PASSWORD_HASHERS его не узнает), хешируем его
+        if self.password:
+            try:
+                identify_hasher(self.password)
+            except ValueError:
+                self.password = make_password(self.password)
+        # agenda_stamp меняется только UPDATE'ом в agenda.py: полное сохранение давно загруженного
+        # учителя не должно откатить его назад
+        if not self._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "agenda_stamp"
+            ]
         super().save(*args, **kwargs)
 
 
@@ -43,10 +77,41 @@ class Student(models.Model):
         return self.name
 
 
+class BioImage(models.Model):
+    """Картинка к био ученика. Оригинал наружу не отдается, только уменьшенные копии (см. images.py)"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='images')
+    image = models.ImageField(upload_to='bio_images/%Y/%m/', width_field='width', height_field='height')
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.student.name}: {self.image.name}"
+
+
+@receiver(post_delete, sender=BioImage)
+def _delete_bio_image_files(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении ученика
+    from .images import delete_variants
+
+    delete_variants(instance)
+    instance.image.delete(save=False)
+
+
 class Lesson(models.Model):
+    MAX_DURATION_MINUTES = 8 * 60
+
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='lessons')
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='lessons')
     start_time = models.DateTimeField()
+    duration_minutes = models.PositiveIntegerField(
+        default=60,
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_DURATION_MINUTES)],
+        help_text="Длительность занятия в минутах",
+    )
 
     notified_one_hour = models.BooleanField(default=False)
     notified_five_minutes = models.BooleanField(default=False)
@@ -56,8 +121,79 @@ class Lesson(models.Model):
 
     class Meta:
         ordering = ["start_time"]
+        indexes = [
+            models.Index(fields=["teacher", "start_time"]),
+            # Версия iCalendar-ленты: Max(updated_at) по учителю
+            models.Index(fields=["teacher", "updated_at"]),
+            # Выборки notifier'а по окну времени и сортировка списка в админке
+            models.Index(fields=["start_time"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.student.name} @ {timezone.localtime(self.start_time).strftime('%Y-%m-%d %H:%M')}"
 
 
+
+
+class ArchivedLesson(models.Model):
+    """Компактная копия прошедшего занятия (без служебных полей)"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='archived_lessons')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='archived_lessons')
+    start_time = models.DateTimeField()
+    duration_minutes = models.PositiveIntegerField(default=60)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-start_time"]
+        indexes = [models.Index(fields=["teacher", "start_time"])]
+
+    def __str__(self) -> str:
+        return f"{self.student.name} @ {timezone.localtime(self.start_time).strftime('%Y-%m-%d %H:%M')} (архив)"
+
+
+class LessonRollup(models.Model):
+    """Инкрементальная статистика занятий: по учителю (student пустой) или по ученику"""
+    PERIOD_WEEK = "week"
+    PERIOD_MONTH = "month"
+    PERIOD_TOTAL = "total"
+    PERIOD_CHOICES = [
+        (PERIOD_WEEK, "Неделя"),
+        (PERIOD_MONTH, "Месяц"),
+        (PERIOD_TOTAL, "Всего"),
+    ]
+
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='rollups')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    # Начало периода (понедельник недели / первое число месяца); для "total" пустое
+    period_start = models.DateField(null=True, blank=True)
+    lessons_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["teacher", "period", "-period_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["teacher", "student", "period", "period_start"],
+                name="rollup_unique_student_period",
+                condition=models.Q(student__isnull=False, period_start__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=["teacher", "period", "period_start"],
+                name="rollup_unique_teacher_period",
+                condition=models.Q(student__isnull=True, period_start__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=["teacher", "student", "period"],
+                name="rollup_unique_student_total",
+                condition=models.Q(student__isnull=False, period_start__isnull=True),
+            ),
+            models.UniqueConstraint(
+                fields=["teacher", "period"],
+                name="rollup_unique_teacher_total",
+                condition=models.Q(student__isnull=True, period_start__isnull=True),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        scope = self.student.name if self.student_id else self.teacher.username
+        return f"{scope}: {self.get_period_display()} {self.period_start or ''} — {self.lessons_count}"
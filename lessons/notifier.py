@@ -7,12 +7,24 @@ from django.conf import settings
 from django.db import close_old_connections
 from django.utils import timezone
 
+from .archive import compact_lessons
 from .models import Lesson
 
+# Как часто переносить прошедшие занятия в архив (в итерациях цикла, ~10 минут)
+ARCHIVE_EVERY_ITERATIONS = 60
+
 _notifier_started = False
 _lock = threading.Lock()
 
 
+def _configure_api() -> None:
+    """Направить pyTelegramBotAPI на свой сервер Bot API (например, локальный фейк для тестов)"""
+    if settings.TELEGRAM_API_URL:
+        from telebot import apihelper
+
+        apihelper.API_URL = settings.TELEGRAM_API_URL
+
+
 def _send_message_to_chat(text: str, chat_id: str) -> bool:
     """Отправить сообщение в Telegram на указанный chat_id"""
     if not chat_id:
@@ -27,6 +39,7 @@ def _send_message_to_chat(text: str, chat_id: str) -> bool:
     try:
         import telebot
 
+        _configure_api()
         bot = telebot.TeleBot(settings.TELEGRAM_BOT_TOKEN, parse_mode=None)
         bot.send_message(chat_id, text)
         print(f"[NOTIFIER SUCCESS] Сообщение отправлено в Telegram: {text[:50]}...")
@@ -49,7 +62,10 @@ def _format_username(username: str) -> str:
 
 def _notifier_loop() -> None:
     print("[NOTIFIER] 🚀 Фоновый поток уведомлений запущен")
-    print(f"[NOTIFIER] Токен бота: {settings.TELEGRAM_BOT_TOKEN[:10]}... (первые 10 символов)")
+    if not settings.TELEGRAM_BOT_TOKEN:
+        print("[WARNING] TELEGRAM_BOT_TOKEN не установлен!")
+    else:
+        print(f"[NOTIFIER] Токен бота: {settings.TELEGRAM_BOT_TOKEN[:10]}... (первые 10 символов)")
     iteration = 0
     while True:
         try:
@@ -85,9 +101,11 @@ def _notifier_loop() -> None:
                     )
                     print(f"[NOTIFIER] Найдено занятие за час: {lesson.student.name} в {local_time.strftime('%H:%M')}")
                     if _send_message_to_chat(msg, lesson.teacher.telegram_chat_id):
-                        # После отправки уведомления за час - удаляем занятие, но оставляем ученика
-                        print(f"[NOTIFIER] Удаление занятия {lesson.id} после отправки уведомления")
-                        lesson.delete()
+                        # Занятие остается до конца, затем уходит в архив (см. compact_lessons)
+                        lesson.notified_one_hour = True
+                        # Без updated_at: отметка не меняет расписание, версия iCalendar-ленты и кэша бота прежняя
+                        lesson.save(update_fields=["notified_one_hour"])
+                        print(f"[NOTIFIER] Уведомление за час отправлено для занятия {lesson.id}")
                     else:
                         print(f"[NOTIFIER] Не удалось отправить уведомление за час для занятия {lesson.id}")
                 except Exception as e:
@@ -114,7 +132,7 @@ def _notifier_loop() -> None:
                     print(f"[NOTIFIER] Найдено занятие за 5 минут: {lesson.student.name} в {local_time.strftime('%H:%M')}")
                     if _send_message_to_chat(msg, lesson.teacher.telegram_chat_id):
                         lesson.notified_five_minutes = True
-                        lesson.save(update_fields=["notified_five_minutes", "updated_at"])
+                        lesson.save(update_fields=["notified_five_minutes"])
                         print(f"[NOTIFIER] Уведомление за 5 минут отправлено для занятия {lesson.id}")
                     else:
                         print(f"[NOTIFIER] Не удалось отправить уведомление за 5 минут для занятия {lesson.id}")
@@ -123,6 +141,12 @@ def _notifier_loop() -> None:
                     import traceback
                     traceback.print_exc()
 
+            # Прошедшие занятия переносим в архив пачками и обновляем статистику
+            if iteration % ARCHIVE_EVERY_ITERATIONS == 0:
+                archived = compact_lessons(now)
+                if archived:
+                    print(f"[NOTIFIER] В архив перенесено занятий: {archived}")
+
         except Exception as e:
             # Never let the loop die; но выводим ошибку для диагностики
             print(f"[NOTIFIER ERROR] Критическая ошибка в цикле: {type(e).__name__}: {str(e)}")
@@ -0,0 +1,183 @@
+from io import BytesIO
+import os
+import re
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib import colors
+
+from .images import get_variant, variant_size
+from .rendering import markdown_to_html
+
+
+def build_bio_pdf(student, teacher) -> bytes:
+    """Собрать PDF с био ученика. Модуль тяжелый (ReportLab), импортируется только из view экспорта"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, 
+                           rightMargin=72, leftMargin=72,
+                           topMargin=72, bottomMargin=72)
+    
+    # Регистрируем шрифт с поддержкой кириллицы
+    # Используем встроенный шрифт, который поддерживает кириллицу
+    # В Windows обычно есть Arial Unicode MS или используем стандартный
+    try:
+        # Пробуем использовать системный шрифт с кириллицей
+        font_paths = [
+            'C:/Windows/Fonts/arial.ttf',
+            'C:/Windows/Fonts/arialbd.ttf',
+            '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+            '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+        ]
+        font_registered = False
+        for font_path in font_paths:
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont('CyrillicFont', font_path))
+                    pdfmetrics.registerFont(TTFont('CyrillicFontBold', font_path.replace('.ttf', 'bd.ttf').replace('-Regular.ttf', '-Bold.ttf')))
+                    font_registered = True
+                    break
+                except:
+                    continue
+    except:
+        pass
+    
+    # Если шрифт не найден, используем стандартный подход с HTML-тегами
+    if not font_registered:
+        # Используем встроенные шрифты ReportLab
+        font_name = 'Helvetica'
+        font_name_bold = 'Helvetica-Bold'
+    else:
+        font_name = 'CyrillicFont'
+        font_name_bold = 'CyrillicFontBold'
+    
+    # Создаем стили с поддержкой кириллицы
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        fontName=font_name_bold,
+        fontSize=22,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        leading=26
+    )
+    
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        fontName=font_name,
+        fontSize=12,
+        textColor=colors.HexColor('#666666'),
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        leading=14
+    )
+    
+    content_style = ParagraphStyle(
+        'CustomContent',
+        fontName=font_name,
+        fontSize=11,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=12,
+        alignment=TA_JUSTIFY,
+        leading=16,
+        leftIndent=0,
+        rightIndent=0
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        fontName=font_name_bold,
+        fontSize=14,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=12,
+        spaceBefore=16,
+        alignment=TA_LEFT,
+        leading=18
+    )
+    
+    story = []
+    
+    # Заголовок
+    title_text = student.name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    story.append(Paragraph(title_text, title_style))
+    story.append(Spacer(1, 0.1*inch))
+    
+    # Информация об учителе
+    teacher_text = f"Учитель: {teacher.username}".replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    story.append(Paragraph(teacher_text, subtitle_style))
+    story.append(Spacer(1, 0.3*inch))
+    
+    # Контент био
+    if student.bio:
+        # Конвертируем MD в HTML
+        html_content = markdown_to_html(student.bio, extensions=['nl2br', 'fenced_code'])
+        
+        # Обрабатываем HTML для ReportLab Paragraph
+        # Разбиваем на параграфы
+        paragraphs = re.split(r'<p>|</p>|<br\s*/?>', html_content)
+        
+        for para in paragraphs:
+            para = para.strip()
+            if not para:
+                continue
+            
+            # Обрабатываем заголовки
+            if para.startswith('<h1>'):
+                text = re.sub(r'<h1>(.*?)</h1>', r'\1', para)
+                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                story.append(Paragraph(text, heading_style))
+            elif para.startswith('<h2>'):
+                text = re.sub(r'<h2>(.*?)</h2>', r'\1', para)
+                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                story.append(Paragraph(text, heading_style))
+            elif para.startswith('<h3>'):
+                text = re.sub(r'<h3>(.*?)</h3>', r'\1', para)
+                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                story.append(Paragraph(text, heading_style))
+            elif para.startswith('<ul>') or para.startswith('<ol>'):
+                # Обрабатываем списки
+                items = re.findall(r'<li>(.*?)</li>', para)
+                for item in items:
+                    text = item.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                    story.append(Paragraph(f"• {text}", content_style))
+            elif para.startswith('<code>') or para.startswith('<pre>'):
+                # Код пропускаем или обрабатываем отдельно
+                text = re.sub(r'<code>(.*?)</code>', r'\1', para)
+                text = re.sub(r'<pre>(.*?)</pre>', r'\1', text, flags=re.DOTALL)
+                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                story.append(Paragraph(text, content_style))
+            else:
+                # Обычный текст
+                # Убираем HTML теги, но сохраняем сущности
+                text = re.sub(r'<[^>]+>', '', para)
+                text = text.replace('&nbsp;', ' ')
+                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                if text.strip():
+                    story.append(Paragraph(text, content_style))
+    else:
+        empty_text = "Биография не заполнена".replace('&', '&amp;')
+        story.append(Paragraph(empty_text, content_style))
+    
+    # Картинки берем из готовой pdf-копии: JPEG встраивается как есть, без повторного декодирования оригинала.
+    # Место под картинку — рамка страницы за вычетом ее внутренних отступов (по 6pt с каждой стороны)
+    # и отступа перед картинкой, иначе высокая картинка не влезет в рамку (LayoutError), а широкая вылезет за поля
+    image_gap = 0.2*inch
+    max_width = doc.width - 12
+    max_height = doc.height - 12 - image_gap
+    for bio_image in student.images.all():
+        try:
+            path = get_variant(bio_image, 'pdf')
+        except FileNotFoundError:
+            continue  # оригинал пропал с диска — экспортируем без него
+        width, height = variant_size(path)
+        scale = min(max_width / width, max_height / height, 1.0)
+        story.append(Spacer(1, image_gap))
+        story.append(Image(str(path), width=width * scale, height=height * scale))
+    
+    doc.build(story)
+    
+    return buffer.getvalue()
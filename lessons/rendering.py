@@ -0,0 +1,5 @@
+def markdown_to_html(text: str, extensions=None) -> str:
+    """Markdown -> HTML. Библиотека markdown импортируется при первом вызове, а не при старте воркера"""
+    import markdown
+
+    return markdown.markdown(text, extensions=extensions or [])
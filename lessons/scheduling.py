@@ -0,0 +1,104 @@
+import heapq
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Lesson
+
+# Занятие не длиннее этого, поэтому пересечения с [start, end) ищутся только среди занятий,
+# начавшихся не раньше start - MAX_LESSON_DURATION: узкий диапазон по индексу (teacher, start_time)
+MAX_LESSON_DURATION = timedelta(minutes=Lesson.MAX_DURATION_MINUTES)
+
+
+def lesson_end(start_time, duration_minutes: int):
+    return start_time + timedelta(minutes=duration_minutes)
+
+
+def describe(lesson) -> str:
+    local = timezone.localtime(lesson.start_time)
+    end = timezone.localtime(lesson_end(lesson.start_time, lesson.duration_minutes))
+    return f"{local.strftime('%Y-%m-%d %H:%M')}–{end.strftime('%H:%M')} ({lesson.student.name})"
+
+
+def find_conflicts(teacher_id: int, start_time, duration_minutes: int, exclude_id=None) -> list:
+    """Занятия учителя, пересекающиеся с интервалом [start_time, start_time + duration)"""
+    end_time = lesson_end(start_time, duration_minutes)
+    candidates = (
+        Lesson.objects.filter(
+            teacher_id=teacher_id,
+            start_time__gt=start_time - MAX_LESSON_DURATION,
+            start_time__lt=end_time,
+        )
+        .select_related("student")
+        .order_by("start_time")
+    )
+    if exclude_id is not None:
+        candidates = candidates.exclude(id=exclude_id)
+    return [lesson for lesson in candidates if lesson_end(lesson.start_time, lesson.duration_minutes) > start_time]
+
+
+def find_batch_conflicts(teacher_id: int, new_lessons: list, exclude_ids=()) -> list[tuple]:
+    """Проверить пачку новых занятий (серия или импорт) за два прохода.
+
+    Один запрос за существующими занятиями в общем диапазоне пачки, затем сортировка и проходы
+    с запоминанием самого позднего конца. Первый проход сверяет новые занятия только с существующими,
+    второй — прошедшие его новые между собой: занятие, которое все равно не будет сохранено,
+    не должно отклонять следующие. Возвращает пары (новое занятие, с чем пересеклось).
+    exclude_ids — существующие занятия, которые не учитываются (например, сдвигаемые: их новые
+    положения переданы в new_lessons).
+    """
+    if not new_lessons:
+        return []
+    first_start = min(lesson.start_time for lesson in new_lessons)
+    last_end = max(lesson_end(lesson.start_time, lesson.duration_minutes) for lesson in new_lessons)
+    existing = list(
+        Lesson.objects.filter(
+            teacher_id=teacher_id,
+            start_time__gt=first_start - MAX_LESSON_DURATION,
+            start_time__lt=last_end,
+        )
+        .exclude(id__in=exclude_ids)
+        .select_related("student")
+    )
+
+    # (начало, конец, новое ли, занятие); при равном начале существующие идут первыми
+    items = [(l.start_time, lesson_end(l.start_time, l.duration_minutes), False, l) for l in existing]
+    items += [(l.start_time, lesson_end(l.start_time, l.duration_minutes), True, l) for l in new_lessons]
+    items.sort(key=lambda item: (item[0], item[2]))
+
+    conflicts = []
+    rejected = set()
+    # 1. Новые против существующих. Новое отклоняется, если начинается внутри существующего
+    # (помним существующее с самым поздним концом) или существующее начинается внутри него
+    # (куча еще не закончившихся новых по концу)
+    latest = None
+    open_new = []
+    for item in items:
+        start, end, is_new, lesson = item
+        if is_new:
+            if latest is not None and start < latest[1]:
+                conflicts.append((lesson, latest[3]))
+                rejected.add(id(lesson))
+            else:
+                heapq.heappush(open_new, (end, id(lesson), lesson))
+            continue
+        while open_new and open_new[0][0] <= start:
+            heapq.heappop(open_new)
+        for _end, _key, new in open_new:
+            conflicts.append((new, lesson))
+            rejected.add(id(new))
+        open_new.clear()
+        if latest is None or end > latest[1]:
+            latest = item
+    accepted = [item for item in items if item[2] and id(item[3]) not in rejected]
+
+    # 2. Принятые новые между собой (порядок по началу уже есть)
+    latest = None
+    for item in accepted:
+        start, end, _is_new, lesson = item
+        if latest is not None and start < latest[1]:
+            conflicts.append((lesson, latest[3]))
+            continue  # отклоненное занятие не должно влиять на проверку следующих
+        if latest is None or end > latest[1]:
+            latest = item
+    return conflicts
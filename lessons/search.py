@@ -0,0 +1,144 @@
+import re
+
+from django.db import connection, connections
+
+from .models import Student
+
+# Полнотекстовый индекс по Student.name и Student.bio (см. миграции 0004 и 0012_student_search_prefix):
+# - SQLite: FTS5-таблица без своей копии текста (content=''), синхронизируется триггерами
+#   на insert/update/delete; prefix='2 3' — отдельные индексы префиксов из 2 и 3 букв;
+#   колонка teacher ("t<id>") — токен учителя: отбор по нему идет внутри FTS5, до ранжирования;
+# - PostgreSQL: GIN-индекс по to_tsvector, синхронизируется самой СУБД.
+# Токенизатор не приравнивает ё к е, поэтому и в индекс, и в запрос текст идет с ё -> е.
+# Важно для SQLite: любой AlterField/AddField у Student Django применяет пересборкой таблицы
+# (новая таблица, копирование, переименование), и триггеры при этом молча пропадают —
+# так уже было бы с миграцией 0002_alter_student_name. Поэтому после migrate и перед первым
+# поиском в процессе вызывается ensure_search_index(): он пересоздает триггеры и перестраивает индекс.
+FTS_TABLE = "lessons_student_fts"
+# Префиксный запрос только от стольких букв: "а*" совпадает почти со всем и ранжируется долго
+MIN_PREFIX_LENGTH = 2
+
+
+def _fold_sql(expr: str) -> str:
+    return f"replace(replace(coalesce({expr}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _fts_values(row: str) -> str:
+    return f"{row}.id, {_fold_sql(f'{row}.name')}, {_fold_sql(f'{row}.bio')}, 't' || {row}.teacher_id"
+
+
+SQLITE_TRIGGERS = {
+    "lessons_student_fts_ai": (
+        "CREATE TRIGGER IF NOT EXISTS lessons_student_fts_ai AFTER INSERT ON lessons_student BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, name, bio, teacher) VALUES ({_fts_values('new')}); END"
+    ),
+    "lessons_student_fts_ad": (
+        "CREATE TRIGGER IF NOT EXISTS lessons_student_fts_ad AFTER DELETE ON lessons_student BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, bio, teacher) VALUES ('delete', {_fts_values('old')}); END"
+    ),
+    "lessons_student_fts_au": (
+        "CREATE TRIGGER IF NOT EXISTS lessons_student_fts_au AFTER UPDATE OF name, bio, teacher_id ON lessons_student BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, bio, teacher) VALUES ('delete', {_fts_values('old')}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, name, bio, teacher) VALUES ({_fts_values('new')}); END"
+    ),
+}
+# Заполнить индекс заново (у таблицы без content команда 'rebuild' недоступна)
+SQLITE_REFILL = [
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')",
+    f"INSERT INTO {FTS_TABLE}(rowid, name, bio, teacher) SELECT {_fts_values('s')} FROM lessons_student s",
+]
+PG_VECTOR = "to_tsvector('simple', translate(coalesce(name, '') || ' ' || coalesce(bio, ''), 'ёЁ', 'еЕ'))"
+SEARCH_LIMIT = 100
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_index_checked = False
+
+
+def ensure_search_index(conn=None) -> bool:
+    """Вернуть потерянные триггеры FTS5 и перестроить индекс. True — индекс пришлось чинить"""
+    conn = conn or connection
+    if conn.vendor != "sqlite":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s OR name IN (%s, %s, %s)",
+            [FTS_TABLE, *SQLITE_TRIGGERS],
+        )
+        found = {name for _type, name in cursor.fetchall()}
+        if FTS_TABLE not in found:
+            return False  # миграция 0004 еще не применена
+        missing = [name for name in SQLITE_TRIGGERS if name not in found]
+        if not missing:
+            return False
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        # Пока триггеров не было, изменения учеников в индекс не попадали
+        for sql in SQLITE_REFILL:
+            cursor.execute(sql)
+    print(f"[SEARCH] Восстановлены триггеры полнотекстового индекса: {', '.join(missing)}")
+    return True
+
+
+def ensure_search_index_after_migrate(sender, using, **kwargs):
+    """post_migrate: пересборка таблицы в миграции могла удалить триггеры"""
+    global _index_checked
+    ensure_search_index(connections[using])
+    _index_checked = True
+
+
+def _terms(query: str) -> list[str]:
+    return _WORD_RE.findall(query.lower().replace("ё", "е"))
+
+
+def _fts5_query(terms: list[str]) -> str:
+    # Каждое слово в кавычках, достаточно длинное — префиксом; слова объединяются через AND
+    return " ".join(f'"{term}"*' if len(term) >= MIN_PREFIX_LENGTH else f'"{term}"' for term in terms)
+
+
+def _tsquery(terms: list[str]) -> str:
+    return " & ".join(f"{term}:*" if len(term) >= MIN_PREFIX_LENGTH else term for term in terms)
+
+
+def _ranked_ids(teacher_id: int, terms: list[str], limit: int) -> list[int] | None:
+    """id учеников по убыванию релевантности; None, если у БД нет полнотекстового индекса"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            # Ученики учителя отбираются токеном teacher внутри MATCH, до bm25; имя весит больше, чем био
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 0.0) LIMIT %s",
+                [f"teacher:t{teacher_id} AND {{name bio}}: ({_fts5_query(terms)})", limit],
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                f"SELECT id FROM lessons_student "
+                f"WHERE teacher_id = %s AND {PG_VECTOR} @@ to_tsquery('simple', %s) "
+                f"ORDER BY ts_rank({PG_VECTOR}, to_tsquery('simple', %s)) DESC LIMIT %s",
+                [teacher_id, _tsquery(terms), _tsquery(terms), limit],
+            )
+        else:
+            return None
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_students(teacher, query: str, limit: int = SEARCH_LIMIT) -> list:
+    """Поиск учеников учителя по имени и био с учетом префиксов, отсортированный по релевантности"""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    global _index_checked
+    if not _index_checked:
+        ensure_search_index()
+        _index_checked = True
+
+    ids = _ranked_ids(teacher.id, terms, limit)
+    if ids is None:
+        # Другие СУБД: обычный LIKE-поиск без ранжирования
+        qs = Student.objects.filter(teacher=teacher)
+        for term in terms:
+            qs = qs.filter(name__icontains=term) | qs.filter(bio__icontains=term)
+        return list(qs[:limit])
+
+    by_id = Student.objects.filter(teacher=teacher).in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id]
@@ -0,0 +1,69 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+
+class FakeBotAPI:
+    """Локальный фейк Telegram Bot API: ровно столько, сколько нужно тестам.
+
+    getUpdates отдает накопленные updates с учетом offset, sendMessage записывает сообщения
+    в sent, остальные методы отвечают True. Адрес подставляется в TELEGRAM_API_URL.
+    """
+
+    def __init__(self):
+        self.updates: list[dict] = []
+        self.sent: list[dict] = []
+        self.calls: list[str] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/bot{{0}}/{{1}}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _call(self, method: str, params: dict):
+        self.calls.append(method)
+        if method == "getUpdates":
+            offset = int(params.get("offset", 0))
+            # Как настоящий Bot API: offset подтверждает все updates до него
+            self.updates = [update for update in self.updates if update["update_id"] >= offset]
+            return self.updates
+        if method == "sendMessage":
+            self.sent.append(params)
+            return {"message_id": len(self.sent), "date": 0, "chat": {"id": params.get("chat_id"), "type": "private"}}
+        return True
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    params.update(parse_qsl(self.rfile.read(length).decode()))
+                result = fake._call(url.path.rsplit("/", 1)[-1], params)
+                body = json.dumps({"ok": True, "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,49 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Lesson, Student, Teacher
+
+BASE = timezone.make_aware(datetime(2030, 1, 7, 10, 0))
+
+
+def at(minutes: int):
+    """Момент через minutes минут после BASE (фиксированная дата в будущем)"""
+    return BASE + timedelta(minutes=minutes)
+
+
+def jsonl(*records) -> io.BytesIO:
+    return io.BytesIO("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode())
+
+
+class ScheduleTestCase(TestCase):
+    def setUp(self):
+        self.teacher = Teacher.objects.create(username="teacher", password="x")
+        self.student = Student.objects.create(name="Ученик", teacher=self.teacher)
+
+    def lesson(self, start: int, duration: int = 60, save: bool = True, student=None) -> Lesson:
+        lesson = Lesson(
+            student=student or self.student,
+            teacher=self.teacher,
+            start_time=at(start),
+            duration_minutes=duration,
+        )
+        if save:
+            lesson.save()
+        return lesson
+
+    def lesson_record(self, start: int, duration: int = 60, student: str = "Ученик") -> dict:
+        return {
+            "type": "lesson",
+            "student": student,
+            "start_time": at(start).isoformat(),
+            "duration_minutes": duration,
+        }
+
+    def log_in(self, teacher=None) -> None:
+        session = self.client.session
+        session["teacher_id"] = (teacher or self.teacher).id
+        session.save()
@@ -0,0 +1,118 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from .. import events
+from ..models import Lesson, Student, Teacher
+from .helpers import ScheduleTestCase, at
+
+
+class LessonAdminActionTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin_user)
+        self.other = Teacher.objects.create(username="other", password="x")
+        self.queues = {}
+        for teacher in (self.teacher, self.other):
+            self.queues[teacher.id] = events.subscribe(teacher.id)
+            self.addCleanup(events.unsubscribe, teacher.id, self.queues[teacher.id])
+
+    def run_action(self, action, lessons, **data):
+        return self.client.post(
+            reverse("admin:lessons_lesson_changelist"),
+            {"action": action, "_selected_action": [lesson.id for lesson in lessons], **data},
+            follow=True,
+        )
+
+    def received(self, teacher) -> list[str]:
+        q = self.queues[teacher.id]
+        messages = []
+        while not q.empty():
+            messages.append(q.get_nowait())
+        return messages
+
+    def stamp(self, teacher) -> int:
+        return Teacher.objects.get(id=teacher.id).agenda_stamp
+
+    def test_reset_notifications_keeps_updated_at_and_resyncs(self):
+        lesson = self.lesson(0)
+        Lesson.objects.filter(id=lesson.id).update(notified_one_hour=True, notified_five_minutes=True)
+        self.received(self.teacher)
+
+        self.run_action("reset_notifications", [lesson])
+
+        refreshed = Lesson.objects.get(id=lesson.id)
+        self.assertFalse(refreshed.notified_one_hour or refreshed.notified_five_minutes)
+        self.assertEqual(refreshed.updated_at, lesson.updated_at)
+        self.assertEqual(self.received(self.teacher), [events.RESYNC_MESSAGE])
+
+    def test_shift_moves_lessons_and_resyncs(self):
+        lesson = self.lesson(0)
+        self.received(self.teacher)
+        stamp = self.stamp(self.teacher)
+
+        self.run_action("shift_start_time", [lesson], shift_minutes=90)
+
+        self.assertEqual(Lesson.objects.get(id=lesson.id).start_time, at(90))
+        self.assertGreater(self.stamp(self.teacher), stamp)
+        self.assertEqual(self.received(self.teacher), [events.RESYNC_MESSAGE])
+
+    def test_shift_without_minutes_is_refused(self):
+        lesson = self.lesson(0)
+
+        response = self.run_action("shift_start_time", [lesson], shift_minutes="")
+
+        self.assertContains(response, "Укажите сдвиг в минутах")
+        self.assertEqual(Lesson.objects.get(id=lesson.id).start_time, at(0))
+
+    def test_shift_into_another_lesson_is_refused(self):
+        lesson = self.lesson(0)
+        self.lesson(120)
+
+        response = self.run_action("shift_start_time", [lesson], shift_minutes=90)
+
+        self.assertContains(response, "пересечется с занятием")
+        self.assertEqual(Lesson.objects.get(id=lesson.id).start_time, at(0))
+
+    def test_shift_of_back_to_back_lessons_ignores_their_old_places(self):
+        first = self.lesson(0)
+        second = self.lesson(60)
+
+        self.run_action("shift_start_time", [first, second], shift_minutes=30)
+
+        self.assertEqual(
+            list(Lesson.objects.order_by("start_time").values_list("start_time", flat=True)), [at(30), at(90)]
+        )
+
+    def test_reassign_moves_students_with_all_their_lessons(self):
+        first = self.lesson(0)
+        second = self.lesson(120)
+        self.received(self.teacher)
+
+        self.run_action("reassign_teacher", [first], new_teacher=self.other.id)
+
+        self.assertEqual(Student.objects.get(id=self.student.id).teacher_id, self.other.id)
+        self.assertEqual(
+            set(Lesson.objects.filter(teacher=self.other).values_list("id", flat=True)), {first.id, second.id}
+        )
+        self.assertEqual(self.received(self.teacher), [events.RESYNC_MESSAGE])
+        self.assertIn(events.RESYNC_MESSAGE, self.received(self.other))
+
+    def test_reassign_refuses_name_clash(self):
+        Student.objects.create(name=self.student.name, teacher=self.other)
+        lesson = self.lesson(0)
+
+        response = self.run_action("reassign_teacher", [lesson], new_teacher=self.other.id)
+
+        self.assertContains(response, "уже есть ученики с такими именами")
+        self.assertEqual(Lesson.objects.get(id=lesson.id).teacher_id, self.teacher.id)
+
+    def test_reassign_refuses_overlap(self):
+        other_student = Student.objects.create(name="Чужой", teacher=self.other)
+        Lesson.objects.create(student=other_student, teacher=self.other, start_time=at(30), duration_minutes=60)
+        lesson = self.lesson(0)
+
+        response = self.run_action("reassign_teacher", [lesson], new_teacher=self.other.id)
+
+        self.assertContains(response, "пересекается с занятием")
+        self.assertEqual(Lesson.objects.get(id=lesson.id).teacher_id, self.teacher.id)
@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from ..apps import should_start_notifier
+
+
+class ShouldStartNotifierTests(SimpleTestCase):
+    def test_management_commands_except_runserver_skip_notifier(self):
+        for argv in (
+            ["manage.py", "migrate"],
+            ["/usr/bin/django-admin", "shell"],
+            ["/usr/lib/python3/site-packages/django/__main__.py", "migrate"],
+            ["manage.py", "telegram_poll"],
+            ["manage.py", "help"],
+        ):
+            with self.subTest(argv=argv):
+                self.assertFalse(should_start_notifier(argv))
+
+    def test_runserver_and_wsgi_servers_start_notifier(self):
+        for argv in (
+            ["manage.py", "runserver"],
+            ["/usr/lib/python3/site-packages/django/__main__.py", "runserver", "0.0.0.0:8000"],
+            ["/usr/bin/gunicorn", "learn_time_check.wsgi"],
+        ):
+            with self.subTest(argv=argv):
+                self.assertTrue(should_start_notifier(argv))
@@ -0,0 +1,73 @@
+from datetime import date
+from unittest import mock
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..archive import _add_to_rollup, compact_lessons, get_rollup_stats
+from ..models import ArchivedLesson, Lesson, LessonRollup, Student
+from .helpers import ScheduleTestCase, at
+
+
+class RollupTests(ScheduleTestCase):
+    def test_stats_by_week_month_and_total(self):
+        other = Student.objects.create(name="Другой", teacher=self.teacher)
+        day = 24 * 60
+        self.lesson(10 * day, 30)  # четверг, 17.01
+        self.lesson(10 * day + 60, 30, student=other)
+        self.lesson(0, 30)  # прошлая неделя того же месяца
+        self.lesson(-40 * day, 30)  # прошлый месяц
+        now = at(11 * day)
+
+        self.assertEqual(compact_lessons(now, batch_size=2), 4)
+        stats = get_rollup_stats(self.teacher, today=timezone.localdate(now))
+
+        self.assertEqual(stats["teacher"], {"week": 2, "month": 3, "total": 4})
+        self.assertEqual(stats["students"][self.student.id], {"week": 1, "month": 2, "total": 3})
+        self.assertEqual(stats["students"][other.id], {"week": 1, "month": 1, "total": 1})
+        self.assertFalse(Lesson.objects.exists())
+        self.assertEqual(ArchivedLesson.objects.count(), 4)
+
+    def test_rollups_are_incremental(self):
+        self.lesson(0, 30)
+        compact_lessons(at(60))
+        self.lesson(120, 30)
+        compact_lessons(at(180))
+
+        total = LessonRollup.objects.get(
+            teacher=self.teacher, student=None, period=LessonRollup.PERIOD_TOTAL, period_start=None
+        )
+        self.assertEqual(total.lessons_count, 2)
+        # Одна строка на (учитель, ученик, период) — ничего не дублируется
+        self.assertEqual(LessonRollup.objects.filter(teacher=self.teacher).count(), 6)
+
+    def test_upcoming_lessons_are_not_counted(self):
+        self.lesson(0, 30)
+
+        self.assertEqual(compact_lessons(at(-60)), 0)
+        self.assertEqual(get_rollup_stats(self.teacher, today=date(2030, 1, 7))["teacher"]["total"], 0)
+
+    def test_row_created_by_another_process_is_incremented(self):
+        lookup = {
+            "teacher_id": self.teacher.id,
+            "student_id": None,
+            "period": LessonRollup.PERIOD_TOTAL,
+            "period_start": None,
+        }
+        LessonRollup.objects.create(lessons_count=5, **lookup)
+        real_filter = LessonRollup.objects.filter
+        calls = []
+
+        def racing_filter(**kwargs):
+            # Первый update "не видит" строку, как если бы ее вставили параллельно
+            qs = real_filter(**kwargs)
+            if not calls:
+                calls.append(kwargs)
+                return mock.Mock(update=mock.Mock(return_value=0))
+            return qs
+
+        with mock.patch.object(LessonRollup.objects, "filter", side_effect=racing_filter):
+            with transaction.atomic():
+                _add_to_rollup(lookup, 2)
+
+        self.assertEqual(real_filter(**lookup).get().lessons_count, 7)
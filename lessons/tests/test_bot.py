@@ -0,0 +1,189 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..agenda import get_agenda, invalidate_agenda
+from ..bot import handle_update, reply_to_command
+from ..models import Lesson, Teacher
+from .fake_bot_api import FakeBotAPI
+from .helpers import ScheduleTestCase
+
+CHAT_ID = 42
+
+
+class BotTestCase(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.teacher.telegram_chat_id = str(CHAT_ID)
+        self.teacher.save()
+
+    def upcoming(self, hours: int, save: bool = True) -> Lesson:
+        lesson = Lesson(
+            student=self.student,
+            teacher=self.teacher,
+            start_time=timezone.now() + timedelta(hours=hours),
+            duration_minutes=60,
+        )
+        if save:
+            lesson.save()
+        return lesson
+
+    def stamp(self) -> int:
+        return Teacher.objects.get(id=self.teacher.id).agenda_stamp
+
+
+class AgendaTests(BotTestCase):
+    def test_cached_agenda_costs_only_the_teacher_lookup(self):
+        self.upcoming(2)
+        reply_to_command(CHAT_ID, "/next")
+
+        with self.assertNumQueries(1):
+            reply = reply_to_command(CHAT_ID, "/next")
+
+        self.assertIn("Ученик", reply)
+
+    def test_own_changes_are_patched_in_place(self):
+        first = self.upcoming(5)
+        reply_to_command(CHAT_ID, "/week")
+        earlier = self.upcoming(2)
+        first.delete()
+
+        with self.assertNumQueries(1):
+            entries = get_agenda(Teacher.objects.get(id=self.teacher.id), timezone.now(), timezone.now() + timedelta(days=7))
+
+        self.assertEqual([entry[1] for entry in entries], [earlier.id])
+
+    def test_change_from_another_process_rebuilds_agenda(self):
+        reply_to_command(CHAT_ID, "/next")
+        # Другой процесс: занятие появилось в БД, отметка сдвинута, а кэш этого процесса не тронут
+        lesson = self.upcoming(2, save=False)
+        Lesson.objects.bulk_create([lesson])
+        Teacher.objects.filter(id=self.teacher.id).update(agenda_stamp=F("agenda_stamp") + 1)
+
+        self.assertIn("Ученик", reply_to_command(CHAT_ID, "/next"))
+
+    def test_conflicting_stamp_drops_local_entry(self):
+        self.upcoming(2)
+        reply_to_command(CHAT_ID, "/next")
+        Teacher.objects.filter(id=self.teacher.id).update(agenda_stamp=F("agenda_stamp") + 1)
+
+        lesson = self.upcoming(1)
+
+        with self.assertNumQueries(2):
+            entries = get_agenda(Teacher.objects.get(id=self.teacher.id), timezone.now(), timezone.now() + timedelta(days=7))
+        self.assertEqual(entries[0][1], lesson.id)
+
+    def test_reminder_flags_and_archived_lessons_keep_the_stamp(self):
+        lesson = self.upcoming(2)
+        past = self.upcoming(-3)
+        stamp = self.stamp()
+
+        lesson.notified_one_hour = True
+        lesson.save(update_fields=["notified_one_hour"])
+        past.delete()
+
+        self.assertEqual(self.stamp(), stamp)
+
+    def test_student_rename_and_bulk_changes_move_the_stamp(self):
+        stamp = self.stamp()
+        self.student.name = "Новое имя"
+        self.student.save()
+        self.assertEqual(self.stamp(), stamp + 1)
+
+        invalidate_agenda(self.teacher.id)
+        self.assertEqual(self.stamp(), stamp + 2)
+
+    def test_stale_teacher_save_does_not_roll_stamp_back(self):
+        stale = Teacher.objects.get(id=self.teacher.id)
+        self.upcoming(2)
+        stamp = self.stamp()
+
+        stale.telegram_chat_id = "43"
+        stale.save()
+
+        self.assertEqual(self.stamp(), stamp)
+
+
+class HandleUpdateTests(BotTestCase):
+    def message(self, text, chat_id=CHAT_ID) -> dict:
+        return {"update_id": 1, "message": {"chat": {"id": chat_id}, "text": text}}
+
+    def test_commands(self):
+        self.upcoming(30)
+
+        self.assertIn("teacher", handle_update(self.message("/start"))[1])
+        self.assertIn("Ученик", handle_update(self.message("/next@my_bot"))[1])
+        self.assertIn("Ученик", handle_update(self.message("/week"))[1])
+        self.assertIn("Неизвестная команда", handle_update(self.message("/foo"))[1])
+
+    def test_unknown_chat_gets_its_id(self):
+        chat_id, reply = handle_update(self.message("/today", chat_id=7))
+
+        self.assertEqual(chat_id, 7)
+        self.assertIn("Chat ID 7", reply)
+
+    def test_not_a_command_is_ignored(self):
+        self.assertIsNone(handle_update(self.message("привет")))
+        self.assertIsNone(handle_update({"update_id": 1, "callback_query": {}}))
+
+
+@override_settings(TELEGRAM_WEBHOOK_SECRET="секрет")
+class WebhookTests(BotTestCase):
+    def post(self, body, secret="секрет", header="секрет"):
+        headers = {"HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN": header} if header is not None else {}
+        return self.client.post(
+            reverse("telegram_webhook", args=[secret]), body, content_type="application/json", **headers
+        )
+
+    def test_reply_is_returned_inline(self):
+        update = {"update_id": 1, "message": {"chat": {"id": CHAT_ID}, "text": "/week"}}
+
+        response = self.post(json.dumps(update))
+
+        self.assertEqual(response.json()["method"], "sendMessage")
+        self.assertEqual(response.json()["chat_id"], CHAT_ID)
+
+    def test_wrong_secret_is_rejected(self):
+        self.assertEqual(self.post("{}", secret="чужой").status_code, 403)
+        self.assertEqual(self.post("{}", header="чужой").status_code, 403)
+        self.assertEqual(self.post("{}", header=None).status_code, 403)
+
+    def test_bad_json_and_non_commands(self):
+        self.assertEqual(self.post("not json").status_code, 400)
+        self.assertEqual(self.post(json.dumps({"update_id": 1})).content, b"ok")
+
+    @override_settings(TELEGRAM_WEBHOOK_SECRET="")
+    def test_disabled_without_secret(self):
+        self.assertEqual(self.post("{}", secret="x", header="").status_code, 403)
+
+
+class TelegramPollTests(BotTestCase):
+    def test_once_answers_and_confirms_updates(self):
+        self.upcoming(2)
+        from telebot import apihelper
+
+        self.addCleanup(setattr, apihelper, "API_URL", apihelper.API_URL)
+        with FakeBotAPI() as fake, override_settings(TELEGRAM_BOT_TOKEN="123:abc", TELEGRAM_API_URL=fake.api_url):
+            fake.updates = [
+                {"update_id": 5, "message": {"chat": {"id": CHAT_ID}, "text": "/next"}},
+                {"update_id": 6, "message": {"chat": {"id": CHAT_ID}, "text": "просто текст"}},
+            ]
+            # Внутри транзакции теста соединение закрывать нельзя
+            with mock.patch("lessons.management.commands.telegram_poll.close_old_connections"):
+                call_command("telegram_poll", "--once", stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(fake.calls, ["deleteWebhook", "getUpdates", "sendMessage", "getUpdates"])
+        self.assertEqual(len(fake.sent), 1)
+        self.assertEqual(fake.sent[0]["chat_id"], str(CHAT_ID))
+        self.assertIn("Ученик", fake.sent[0]["text"])
+        self.assertEqual(fake.updates, [])
@@ -0,0 +1,63 @@
+from django.urls import reverse
+
+from ..archive import compact_lessons
+from .helpers import ScheduleTestCase, at
+
+
+class CalendarFeedTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher.regenerate_calendar_token()
+        self.url = reverse("calendar_feed", args=[self.teacher.calendar_token])
+        self.first = self.lesson(0)
+        self.second = self.lesson(120)
+
+    def get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def etag(self) -> str:
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_unchanged_feed_is_not_modified(self):
+        response = self.get()
+
+        self.assertIn("BEGIN:VCALENDAR", b"".join(response.streaming_content).decode())
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(self.get(response["ETag"]).status_code, 304)
+
+    def test_if_modified_since_alone_does_not_give_304(self):
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_changes_etag(self):
+        etag = self.etag()
+        self.second.delete()
+
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_archival_changes_etag(self):
+        etag = self.etag()
+        compact_lessons(at(90))
+
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_teacher_rename_changes_etag(self):
+        etag = self.etag()
+        self.teacher.username = "renamed"
+        self.teacher.save()
+
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_reminder_flags_keep_etag(self):
+        etag = self.etag()
+        self.first.notified_one_hour = True
+        self.first.save(update_fields=["notified_one_hour"])
+
+        self.assertEqual(self.get(etag).status_code, 304)
+
+    def test_unknown_token_is_404(self):
+        self.assertEqual(self.client.get(reverse("calendar_feed", args=["nope"])).status_code, 404)
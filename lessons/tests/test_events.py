@@ -0,0 +1,84 @@
+import json
+
+from django.urls import reverse
+
+from .. import events
+from .helpers import ScheduleTestCase
+
+
+class PublishTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = events.subscribe(self.teacher.id)
+        self.addCleanup(events.unsubscribe, self.teacher.id, self.queue)
+
+    def received(self) -> list[str]:
+        messages = []
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+    def test_lesson_changes_are_published(self):
+        lesson = self.lesson(0)
+        lesson.notified_one_hour = True
+        lesson.save(update_fields=["notified_one_hour"])
+        lesson.duration_minutes = 90
+        lesson.save()
+        lesson_id = lesson.id
+        lesson.delete()
+
+        messages = self.received()
+        self.assertEqual(
+            [message.split("\n")[0] for message in messages],
+            ["event: lesson_added", "event: reminder_sent", "event: lesson_updated", "event: lesson_removed"],
+        )
+        self.assertEqual(json.loads(messages[-1].split("data: ")[1]), {"id": lesson_id})
+
+    def test_other_teachers_events_are_not_delivered(self):
+        events.publish(self.teacher.id + 1, "lesson_removed", {"id": 1})
+
+        self.assertEqual(self.received(), [])
+
+    def test_overflow_replaces_backlog_with_resync(self):
+        for i in range(events.SUBSCRIBER_QUEUE_SIZE + 1):
+            events.publish(self.teacher.id, "lesson_removed", {"id": i})
+
+        self.assertEqual(self.received(), [events.RESYNC_MESSAGE])
+
+        events.publish(self.teacher.id, "lesson_removed", {"id": 1})
+        self.assertEqual(self.received(), [events.format_sse("lesson_removed", {"id": 1})])
+
+    def test_unsubscribed_queue_gets_nothing(self):
+        events.unsubscribe(self.teacher.id, self.queue)
+
+        self.lesson(0)
+
+        self.assertEqual(self.received(), [])
+        self.assertFalse(events.has_subscribers(self.teacher.id))
+
+
+class DashboardViewTests(ScheduleTestCase):
+    def test_snapshot_lists_upcoming_lessons(self):
+        lesson = self.lesson(0)
+        self.log_in()
+
+        response = self.client.get(reverse("dashboard_lessons"))
+
+        self.assertEqual([item["id"] for item in response.json()["lessons"]], [lesson.id])
+
+    def test_snapshot_and_stream_require_login(self):
+        self.assertEqual(self.client.get(reverse("dashboard_lessons")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("dashboard_events")).status_code, 403)
+
+    def test_stream_subscribes_before_first_chunk_and_unsubscribes_on_close(self):
+        self.log_in()
+        response = self.client.get(reverse("dashboard_events"))
+        stream = iter(response.streaming_content)
+
+        self.assertEqual(next(stream), b"retry: 5000\n\n")
+        self.assertTrue(events.has_subscribers(self.teacher.id))
+        events.publish(self.teacher.id, "resync", {})
+        self.assertEqual(next(stream), events.RESYNC_MESSAGE.encode())
+
+        response.close()
+        self.assertFalse(events.has_subscribers(self.teacher.id))
@@ -0,0 +1,121 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..hashing import PasswordHasherBusy
+from ..models import Teacher
+from ..throttle import locked_for, register_failure, register_success
+
+IP = "10.0.0.1"
+
+
+@override_settings(
+    LOGIN_THROTTLE_FREE_ATTEMPTS=3,
+    LOGIN_THROTTLE_IP_FREE_ATTEMPTS=10,
+    LOGIN_THROTTLE_BASE_SECONDS=30,
+    LOGIN_THROTTLE_MAX_SECONDS=100,
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch("lessons.throttle.time.time", return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fail(self, times: int, username: str = "teacher") -> None:
+        for _ in range(times):
+            register_failure(username, IP)
+
+    def test_free_attempts_then_growing_lock(self):
+        self.fail(2)
+        self.assertEqual(locked_for("teacher", IP), 0)
+
+        self.fail(1)
+        self.assertEqual(locked_for("teacher", IP), 30)
+        self.fail(1)
+        self.assertEqual(locked_for("Teacher", IP), 60)
+        self.fail(1)
+        self.assertEqual(locked_for("teacher", IP), 100)  # не дольше LOGIN_THROTTLE_MAX_SECONDS
+
+        self.clock.return_value += 100
+        self.assertEqual(locked_for("teacher", IP), 0)
+
+    def test_ip_is_locked_across_usernames(self):
+        for i in range(10):
+            register_failure(f"user{i}", IP)
+
+        self.assertEqual(locked_for("someone_else", IP), 30)
+        self.assertEqual(locked_for("someone_else", "10.0.0.2"), 0)
+
+    def test_success_resets_username_but_not_ip(self):
+        self.fail(3)
+        register_success("teacher")
+
+        self.assertEqual(locked_for("teacher", "10.0.0.2"), 0)
+        self.fail(7, username="other")
+        self.assertEqual(locked_for("teacher", IP), 30)
+
+    def test_concurrent_failures_are_all_counted(self):
+        def worker():
+            self.fail(5)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(cache.get("login-throttle:user:teacher:failures"), 40)
+        self.assertEqual(cache.get(f"login-throttle:ip:{IP}:failures"), 40)
+
+
+@override_settings(LOGIN_THROTTLE_FREE_ATTEMPTS=2)
+class LoginViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.teacher = Teacher.objects.create(username="teacher", password="secret")
+
+    def login(self, password="secret", username="teacher"):
+        return self.client.post(reverse("teacher_login"), {"username": username, "password": password})
+
+    def test_success_logs_in(self):
+        response = self.login()
+
+        self.assertRedirects(response, reverse("students_list"), fetch_redirect_response=False)
+        self.assertEqual(self.client.session["teacher_id"], self.teacher.id)
+
+    def test_locked_login_is_rejected_before_password_check(self):
+        self.assertContains(self.login("wrong"), "Неверный пароль")
+        self.login("wrong")
+
+        with mock.patch("lessons.views.run_hashing") as run_hashing:
+            response = self.login()
+
+        self.assertEqual(response.status_code, 429)
+        run_hashing.assert_not_called()
+        self.assertNotIn("teacher_id", self.client.session)
+
+    def test_busy_hasher_returns_503(self):
+        with mock.patch("lessons.views.run_hashing", side_effect=PasswordHasherBusy):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(locked_for("teacher", "127.0.0.1"), 0)  # перегрузка — не неудачная попытка
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        with override_settings(PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]):
+            Teacher.objects.filter(id=self.teacher.id).update(password=make_password("secret", hasher="md5"))
+
+            self.login()
+
+        self.assertTrue(Teacher.objects.get(id=self.teacher.id).password.startswith("pbkdf2_sha256$"))
+        self.assertIn("teacher_id", self.client.session)
@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from ..models import BioImage
+from ..pdf import build_bio_pdf
+from .helpers import ScheduleTestCase
+
+
+class BioPdfTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def add_image(self, width, height):
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), (200, 100, 50)).save(buffer, "PNG")
+        upload = SimpleUploadedFile("bio.png", buffer.getvalue(), content_type="image/png")
+        return BioImage.objects.create(student=self.student, image=upload)
+
+    def test_tall_and_wide_images_fit_the_page(self):
+        self.student.bio = "Текст био"
+        self.student.save()
+        self.add_image(900, 2000)
+        self.add_image(3000, 400)
+
+        pdf = build_bio_pdf(self.student, self.teacher)
+
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+    def test_missing_original_is_skipped(self):
+        bio_image = self.add_image(100, 100)
+        bio_image.image.storage.delete(bio_image.image.name)
+
+        pdf = build_bio_pdf(self.student, self.teacher)
+
+        self.assertTrue(pdf.startswith(b"%PDF"))
@@ -0,0 +1,134 @@
+import random
+from datetime import timedelta
+
+from ..archive import compact_lessons
+from ..models import ArchivedLesson, Lesson, Student, Teacher
+from ..scheduling import find_batch_conflicts, find_conflicts
+from ..transfer import import_records
+from .helpers import ScheduleTestCase, at, jsonl
+
+
+class FindBatchConflictsTests(ScheduleTestCase):
+    def test_new_lesson_rejected_by_existing_does_not_reject_later_ones(self):
+        existing = self.lesson(30, 10)
+        n1 = self.lesson(0, 60, save=False)
+        n2 = self.lesson(45, 5, save=False)
+
+        conflicts = find_batch_conflicts(self.teacher.id, [n1, n2])
+
+        self.assertEqual(conflicts, [(n1, existing)])
+
+    def test_overlap_with_existing_lesson(self):
+        existing = self.lesson(0, 60)
+        new = self.lesson(30, 60, save=False)
+
+        self.assertEqual(find_batch_conflicts(self.teacher.id, [new]), [(new, existing)])
+
+    def test_overlap_inside_batch(self):
+        first = self.lesson(0, 60, save=False)
+        second = self.lesson(30, 60, save=False)
+        third = self.lesson(60, 30, save=False)
+
+        # third пересекается только с отклоненным second, а с first — нет
+        self.assertEqual(find_batch_conflicts(self.teacher.id, [third, second, first]), [(second, first)])
+
+    def test_existing_lesson_inside_several_new_ones(self):
+        existing = self.lesson(30, 10)
+        outer = self.lesson(0, 60, save=False)
+        inner = self.lesson(20, 15, save=False)
+        before = self.lesson(0, 30, save=False)
+
+        conflicts = find_batch_conflicts(self.teacher.id, [outer, inner, before])
+
+        self.assertCountEqual(conflicts, [(outer, existing), (inner, existing)])
+
+    def test_matches_pairwise_check(self):
+        rng = random.Random(34)
+        for _ in range(20):
+            Lesson.objects.all().delete()
+            existing = [self.lesson(rng.randrange(0, 600), rng.randrange(5, 120)) for _ in range(8)]
+            new = [self.lesson(rng.randrange(0, 600), rng.randrange(5, 120), save=False) for _ in range(12)]
+
+            def overlaps(a, b):
+                return a.start_time < b.start_time + timedelta(minutes=b.duration_minutes) and (
+                    b.start_time < a.start_time + timedelta(minutes=a.duration_minutes)
+                )
+
+            # Эталон: сначала против существующих, затем жадно по началу среди оставшихся
+            expected = {id(l) for l in new if any(overlaps(l, e) for e in existing)}
+            accepted = []
+            for l in sorted((l for l in new if id(l) not in expected), key=lambda l: l.start_time):
+                if any(overlaps(l, a) for a in accepted):
+                    expected.add(id(l))
+                else:
+                    accepted.append(l)
+
+            rejected = {id(l) for l, _other in find_batch_conflicts(self.teacher.id, new)}
+            self.assertEqual(rejected, expected)
+
+    def test_adjacent_lessons_do_not_conflict(self):
+        self.lesson(0, 60)
+        new = [self.lesson(60, 30, save=False), self.lesson(90, 30, save=False)]
+
+        self.assertEqual(find_batch_conflicts(self.teacher.id, new), [])
+
+    def test_long_existing_lesson_covers_later_starts(self):
+        long_lesson = self.lesson(0, 240)
+        self.lesson(10, 10)
+        new = self.lesson(200, 10, save=False)
+
+        self.assertEqual(find_batch_conflicts(self.teacher.id, [new]), [(new, long_lesson)])
+
+    def test_other_teacher_is_ignored(self):
+        other = Teacher.objects.create(username="other", password="x")
+        Lesson.objects.create(
+            student=Student.objects.create(name="Чужой", teacher=other),
+            teacher=other,
+            start_time=at(0),
+            duration_minutes=60,
+        )
+
+        self.assertEqual(find_batch_conflicts(self.teacher.id, [self.lesson(0, 60, save=False)]), [])
+
+
+class ArchiveTests(ScheduleTestCase):
+    def test_running_lesson_stays_visible_to_conflict_checks(self):
+        running = self.lesson(0, 90)
+        now = at(10)
+
+        self.assertEqual(compact_lessons(now), 0)
+        self.assertEqual(find_conflicts(self.teacher.id, at(30), 30), [running])
+
+    def test_ended_lessons_are_archived_with_duration(self):
+        self.lesson(-600, 45)  # давно закончилось
+        self.lesson(-20, 15)  # закончилось недавно
+        self.lesson(-10, 60)  # еще идет
+        now = at(0)
+
+        self.assertEqual(compact_lessons(now, batch_size=1), 2)
+        self.assertEqual(list(Lesson.objects.values_list("start_time", flat=True)), [at(-10)])
+        self.assertEqual(
+            sorted(ArchivedLesson.objects.values_list("duration_minutes", flat=True)),
+            [15, 45],
+        )
+
+
+class ImportConflictTests(ScheduleTestCase):
+    def test_conflicts_are_reported_by_line(self):
+        self.lesson(30, 10)
+
+        result = import_records(
+            self.teacher,
+            jsonl(self.lesson_record(0), self.lesson_record(45, 5), self.lesson_record(48, 10)),
+            "jsonl",
+        )
+
+        # Строка 1 пересекается с существующим, строка 3 — с принятой строкой 2
+        self.assertEqual(result.lessons, 1)
+        self.assertEqual(len(result.errors), 2)
+        self.assertTrue(result.errors[0].startswith("Строка 1:"))
+        self.assertTrue(result.errors[1].startswith("Строка 3:"))
+        self.assertEqual(
+            sorted(Lesson.objects.filter(teacher=self.teacher).values_list("start_time", flat=True)),
+            [at(30), at(45)],
+        )
@@ -0,0 +1,90 @@
+from django.db import connection
+
+from .. import search
+from ..models import Student, Teacher
+from ..search import ensure_search_index, search_students
+from .helpers import ScheduleTestCase
+
+
+class SearchTests(ScheduleTestCase):
+    def names(self, query, teacher=None):
+        return [student.name for student in search_students(teacher or self.teacher, query)]
+
+    def test_name_ranks_above_bio(self):
+        Student.objects.create(name="Анна", teacher=self.teacher, bio="сестра Тимофея")
+        Student.objects.create(name="Тимофей", teacher=self.teacher, bio="шахматы")
+
+        self.assertEqual(self.names("тимофе"), ["Тимофей", "Анна"])
+
+    def test_all_words_must_match(self):
+        Student.objects.create(name="Тимофей", teacher=self.teacher, bio="математика и шахматы")
+        Student.objects.create(name="Тимур", teacher=self.teacher, bio="математика")
+
+        self.assertEqual(self.names("мат шах"), ["Тимофей"])
+
+    def test_single_letter_is_not_a_prefix(self):
+        Student.objects.create(name="Анна", teacher=self.teacher)
+        Student.objects.create(name="Я", teacher=self.teacher, bio="а")
+
+        self.assertEqual(self.names("а"), ["Я"])
+        self.assertEqual(self.names("ан"), ["Анна"])
+
+    def test_yo_is_folded_to_ye(self):
+        Student.objects.create(name="Ёжик", teacher=self.teacher, bio="любит ёлки")
+
+        self.assertEqual(self.names("ежик"), ["Ёжик"])
+        self.assertEqual(self.names("ёлк"), ["Ёжик"])
+
+    def test_other_teachers_students_are_not_found(self):
+        other = Teacher.objects.create(username="other", password="x")
+        Student.objects.create(name="Тимур", teacher=other)
+
+        self.assertEqual(self.names("тим"), [])
+        self.assertEqual(self.names("тим", teacher=other), ["Тимур"])
+
+    def test_index_follows_updates_deletes_and_reassignment(self):
+        student = Student.objects.create(name="Тимофей", teacher=self.teacher, bio="шахматы")
+        student.bio = "рисование"
+        student.save()
+        self.assertEqual(self.names("шах"), [])
+        self.assertEqual(self.names("рис"), ["Тимофей"])
+
+        other = Teacher.objects.create(username="other", password="x")
+        Student.objects.filter(id=student.id).update(teacher=other)
+        self.assertEqual(self.names("рис"), [])
+        self.assertEqual(self.names("рис", teacher=other), ["Тимофей"])
+
+        student.delete()
+        self.assertEqual(self.names("рис", teacher=other), [])
+
+    def test_query_syntax_is_escaped(self):
+        Student.objects.create(name="Тимофей", teacher=self.teacher)
+
+        self.assertEqual(self.names('"*()'), [])
+        self.assertEqual(self.names('тим*")'), ["Тимофей"])
+
+
+class SearchIndexRestoreTests(ScheduleTestCase):
+    def drop_triggers(self):
+        with connection.cursor() as cursor:
+            for name in search.SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+
+    def test_lost_triggers_are_restored_and_index_refilled(self):
+        self.drop_triggers()
+        Student.objects.create(name="Зоркий", teacher=self.teacher)
+        self.assertEqual(search_students(self.teacher, "зорк"), [])
+
+        self.assertTrue(ensure_search_index())
+        self.assertEqual([s.name for s in search_students(self.teacher, "зорк")], ["Зоркий"])
+        self.assertFalse(ensure_search_index())
+
+        Student.objects.create(name="Зорро", teacher=self.teacher)
+        self.assertEqual(len(search_students(self.teacher, "зор")), 2)
+
+    def test_post_migrate_restores_triggers(self):
+        self.drop_triggers()
+        search.ensure_search_index_after_migrate(sender=None, using="default")
+
+        Student.objects.create(name="Зоркий", teacher=self.teacher)
+        self.assertEqual([s.name for s in search_students(self.teacher, "зорк")], ["Зоркий"])
@@ -0,0 +1,47 @@
+from django.urls import reverse
+
+from ..themes import DEFAULT_THEME, theme_css_url
+from .helpers import ScheduleTestCase
+
+
+class SaveThemeTests(ScheduleTestCase):
+    def test_known_theme_is_saved(self):
+        self.log_in()
+
+        response = self.client.post(reverse("save_theme"), {"theme": "ocean"})
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.session["theme"], "ocean")
+
+    def test_unknown_theme_is_rejected(self):
+        self.log_in()
+        self.client.post(reverse("save_theme"), {"theme": "ocean"})
+
+        for data in ({"theme": "../../etc/passwd"}, {"theme": ""}, {}):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post(reverse("save_theme"), data).status_code, 400)
+        self.assertEqual(self.client.session["theme"], "ocean")
+
+    def test_requires_login_and_post(self):
+        self.assertEqual(self.client.post(reverse("save_theme"), {"theme": "ocean"}).status_code, 403)
+        self.log_in()
+        self.assertEqual(self.client.get(reverse("save_theme"), {"theme": "ocean"}).status_code, 405)
+
+    def test_page_links_only_the_active_theme(self):
+        self.log_in()
+        self.client.post(reverse("save_theme"), {"theme": "forest"})
+
+        response = self.client.get(reverse("students_list"))
+
+        self.assertContains(response, theme_css_url("forest"))
+        self.assertNotContains(response, "theme_neon.css")
+
+    def test_bad_theme_in_session_falls_back_to_default(self):
+        self.log_in()
+        session = self.client.session
+        session["theme"] = "missing"
+        session.save()
+
+        response = self.client.get(reverse("students_list"))
+
+        self.assertContains(response, theme_css_url(DEFAULT_THEME))
@@ -0,0 +1,125 @@
+import io
+
+from django.urls import reverse
+
+from .. import events
+from ..archive import compact_lessons, get_rollup_stats
+from ..models import ArchivedLesson, Lesson, Student, Teacher
+from ..transfer import export_csv, export_jsonl, import_records
+from .helpers import ScheduleTestCase, at, jsonl
+
+
+class ImportTests(ScheduleTestCase):
+    def test_duplicate_student_in_batch_keeps_last_bio(self):
+        result = import_records(
+            self.teacher,
+            jsonl(
+                {"type": "student", "name": "Новый", "bio": "первый"},
+                {"type": "student", "name": "Новый", "bio": "второй"},
+                {"type": "student", "name": "Ученик", "bio": "обновлено"},
+            ),
+            "jsonl",
+        )
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(Student.objects.get(teacher=self.teacher, name="Новый").bio, "второй")
+        self.assertEqual(Student.objects.get(id=self.student.id).bio, "обновлено")
+        self.assertEqual(Student.objects.filter(teacher=self.teacher).count(), 2)
+
+    def test_reimport_does_not_duplicate_lessons(self):
+        data = [self.lesson_record(0), self.lesson_record(120)]
+
+        first = import_records(self.teacher, jsonl(*data), "jsonl")
+        second = import_records(self.teacher, jsonl(*data), "jsonl")
+
+        self.assertEqual((first.lessons, first.skipped), (2, 0))
+        self.assertEqual((second.lessons, second.skipped), (0, 2))
+        self.assertEqual(Lesson.objects.filter(teacher=self.teacher).count(), 2)
+
+    def test_invalid_records_are_skipped(self):
+        result = import_records(
+            self.teacher,
+            jsonl(
+                {"type": "lesson", "student": "Ученик", "start_time": "2030-13-45T99:00"},
+                self.lesson_record(0, student="Нет такого"),
+                self.lesson_record(0, duration=1000),
+                {"type": "unknown"},
+            ),
+            "jsonl",
+        )
+
+        self.assertEqual(result.lessons, 0)
+        self.assertEqual(result.skipped, 4)
+        self.assertFalse(Lesson.objects.exists())
+
+    def test_non_utf8_file_is_reported(self):
+        data = "type,name,bio\nstudent,Новый,био\n".encode("cp1251")
+
+        result = import_records(self.teacher, io.BytesIO(data), "csv")
+
+        self.assertEqual(result.students, 0)
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn("UTF-8", result.errors[0])
+
+    def test_import_resyncs_open_dashboards(self):
+        q = events.subscribe(self.teacher.id)
+        self.addCleanup(events.unsubscribe, self.teacher.id, q)
+
+        import_records(self.teacher, jsonl(self.lesson_record(0)), "jsonl")
+
+        self.assertEqual(q.get_nowait(), events.RESYNC_MESSAGE)
+
+    def test_settings_page_shows_decode_error(self):
+        self.log_in()
+        upload = io.BytesIO("type,name\nstudent,Новый\n".encode("cp1251"))
+        upload.name = "data.csv"
+
+        response = self.client.post(reverse("settings_page") + "?tab=data", {"import_data": "1", "file": upload})
+
+        self.assertContains(response, "Файл не в кодировке UTF-8")
+
+
+class RoundTripTests(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student.bio = "био, с запятой\nи переносом"
+        self.student.save()
+        self.lesson(-40 * 24 * 60, 45)
+        self.lesson(0, 30)
+        compact_lessons(at(60))
+        self.lesson(24 * 60, 90)
+        self.copy_to = Teacher.objects.create(username="copy", password="x")
+
+    def assert_copied(self):
+        self.assertEqual(Student.objects.get(teacher=self.copy_to).bio, self.student.bio)
+        self.assertEqual(
+            list(ArchivedLesson.objects.filter(teacher=self.copy_to).order_by("start_time")
+                 .values_list("start_time", "duration_minutes")),
+            [(at(-40 * 24 * 60), 45), (at(0), 30)],
+        )
+        self.assertEqual(
+            list(Lesson.objects.filter(teacher=self.copy_to).values_list("start_time", "duration_minutes")),
+            [(at(24 * 60), 90)],
+        )
+        stats = get_rollup_stats(self.copy_to, today=at(0).date())
+        self.assertEqual(stats["teacher"]["total"], 2)
+
+    def test_jsonl_round_trip_includes_archive(self):
+        data = "".join(export_jsonl(self.teacher)).encode()
+
+        result = import_records(self.copy_to, io.BytesIO(data), "jsonl")
+
+        self.assertEqual((result.students, result.archived, result.lessons), (1, 2, 1))
+        self.assert_copied()
+
+        again = import_records(self.copy_to, io.BytesIO(data), "jsonl")
+        self.assertEqual((again.archived, again.lessons, again.skipped), (0, 0, 3))
+        self.assertEqual(get_rollup_stats(self.copy_to, today=at(0).date())["teacher"]["total"], 2)
+
+    def test_csv_round_trip_includes_archive(self):
+        data = "".join(export_csv(self.teacher)).encode()
+
+        result = import_records(self.copy_to, io.BytesIO(data), "csv")
+
+        self.assertEqual(result.errors, [])
+        self.assert_copied()
@@ -0,0 +1,37 @@
+import hashlib
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+# Темы оформления: каждая — отдельный статический файл static/css/themes/theme_<name>.css,
+# на страницу подключается только активная
+THEMES = {
+    "neon": "Неон",
+    "ocean": "Океан",
+    "forest": "Лес",
+    "sunset": "Закат",
+    "dark": "Темная",
+    "cyber": "Кибер",
+    "rose": "Розовая",
+    "aurora": "Аврора",
+    "minimal": "Минимализм",
+    "retro": "Ретро",
+}
+DEFAULT_THEME = "neon"
+
+
+@lru_cache(maxsize=None)
+def theme_css_url(theme: str) -> str:
+    """URL файла темы с хешем содержимого: браузер кэширует его надолго и перезапрашивает только после правки"""
+    path = f"css/themes/theme_{theme}.css"
+    url = static(path)
+    found = finders.find(path)
+    if found:
+        with open(found, "rb") as css:
+            url += "?v=" + hashlib.md5(css.read()).hexdigest()[:10]
+    return url
+
+
+def theme_urls() -> dict:
+    return {theme: theme_css_url(theme) for theme in THEMES}
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Ограничение попыток входа: счетчики неудач по username и по IP в кэше Django.
+# После LOGIN_THROTTLE_FREE_ATTEMPTS неудач ключ блокируется на base * 2^(лишние неудачи),
+# но не дольше LOGIN_THROTTLE_MAX_SECONDS. Заблокированный вход отклоняется до проверки пароля.
+# Число неудач — атомарный счетчик (cache.add + cache.incr): параллельные неудачные входы
+# не теряют друг друга. Блокировка не хранится, а считается по счетчику и времени последней неудачи.
+
+
+def _key(scope: str, value: str) -> str:
+    return f"login-throttle:{scope}:{value}"
+
+
+def _keys(username: str, ip: str) -> list[tuple[str, int]]:
+    return [
+        (_key("user", username.lower()), settings.LOGIN_THROTTLE_FREE_ATTEMPTS),
+        (_key("ip", ip), settings.LOGIN_THROTTLE_IP_FREE_ATTEMPTS),
+    ]
+
+
+def _lock_seconds(failures: int, free_attempts: int) -> float:
+    extra = failures - free_attempts
+    if extra < 0:
+        return 0
+    return min(settings.LOGIN_THROTTLE_BASE_SECONDS * 2 ** extra, settings.LOGIN_THROTTLE_MAX_SECONDS)
+
+
+def client_ip(request) -> str:
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def locked_for(username: str, ip: str) -> int:
+    """Сколько секунд еще действует блокировка (0 — можно пробовать)"""
+    keys = _keys(username, ip)
+    values = cache.get_many([f"{key}:{part}" for key, _free in keys for part in ("failures", "last")])
+    now = time.time()
+    wait = 0.0
+    for key, free_attempts in keys:
+        failures = values.get(f"{key}:failures")
+        last = values.get(f"{key}:last")
+        if failures and last:
+            wait = max(wait, last + _lock_seconds(failures, free_attempts) - now)
+    return int(wait + 0.999)
+
+
+def register_failure(username: str, ip: str) -> None:
+    now = time.time()
+    # Счетчик живет, пока идут неудачи; после долгой паузы начинаем с нуля
+    timeout = settings.LOGIN_THROTTLE_MAX_SECONDS * 2
+    for key, _free in _keys(username, ip):
+        counter = f"{key}:failures"
+        cache.add(counter, 0, timeout)
+        try:
+            cache.incr(counter)
+        except ValueError:
+            # Счетчик истек между add и incr
+            cache.add(counter, 1, timeout)
+        cache.touch(counter, timeout)
+        cache.set(f"{key}:last", now, timeout)
+
+
+def register_success(username: str) -> None:
+    key = _key("user", username.lower())
+    cache.delete_many([f"{key}:failures", f"{key}:last"])
@@ -0,0 +1,286 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .agenda import invalidate_agenda
+from .archive import store_archived
+from .events import publish_resync
+from .models import ArchivedLesson, Lesson, Student
+from .scheduling import find_batch_conflicts
+
+# Выгрузка/загрузка учеников и занятий учителя. Формат — поток записей:
+# сначала ученики, затем архив прошедших занятий и текущие занятия (ссылаются на ученика по имени).
+# JSON Lines: {"type": "student", "name": ..., "bio": ...}
+#             {"type": "archived_lesson", "student": ..., "start_time": ..., "duration_minutes": ...}
+#             {"type": "lesson", "student": ..., "start_time": ..., "duration_minutes": ...,
+#              "notified_one_hour": ..., "notified_five_minutes": ...}
+# CSV: те же поля в колонках CSV_FIELDS.
+CSV_FIELDS = ["type", "name", "bio", "student", "start_time", "duration_minutes", "notified_one_hour", "notified_five_minutes"]
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+
+def export_records(teacher):
+    """Записи для выгрузки; читаются из БД кусками через iterator(), в памяти не копятся"""
+    students = (
+        Student.objects.filter(teacher=teacher)
+        .order_by("id")
+        .values_list("name", "bio")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for name, bio in students:
+        yield {"type": "student", "name": name, "bio": bio}
+
+    archived = (
+        ArchivedLesson.objects.filter(teacher=teacher)
+        .order_by("start_time")
+        .values_list("student__name", "start_time", "duration_minutes")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for student_name, start_time, duration in archived:
+        yield {
+            "type": "archived_lesson",
+            "student": student_name,
+            "start_time": start_time.isoformat(),
+            "duration_minutes": duration,
+        }
+
+    lessons = (
+        Lesson.objects.filter(teacher=teacher)
+        .order_by("start_time")
+        .values_list("student__name", "start_time", "duration_minutes", "notified_one_hour", "notified_five_minutes")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for student_name, start_time, duration, one_hour, five_minutes in lessons:
+        yield {
+            "type": "lesson",
+            "student": student_name,
+            "start_time": start_time.isoformat(),
+            "duration_minutes": duration,
+            "notified_one_hour": one_hour,
+            "notified_five_minutes": five_minutes,
+        }
+
+
+def export_jsonl(teacher):
+    for record in export_records(teacher):
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(teacher):
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_FIELDS)
+    yield writer.writeheader()
+    for record in export_records(teacher):
+        yield writer.writerow(record)
+
+
+def _read_records(uploaded_file, fmt: str):
+    """(номер строки, запись) из загруженного файла, построчно"""
+    text = codecs.iterdecode(uploaded_file, "utf-8-sig")
+    if fmt == "csv":
+        for line_no, row in enumerate(csv.DictReader(text), start=2):
+            yield line_no, row
+        return
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "да")
+
+
+class ImportResult:
+    def __init__(self):
+        self.students = 0
+        self.lessons = 0
+        self.archived = 0
+        self.skipped = 0
+        self.errors: list[str] = []
+
+    def error(self, line_no: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Строка {line_no}: {message}")
+
+
+def _flush_students(teacher, batch: dict, result: ImportResult) -> None:
+    if not batch:
+        return
+    # Ученик с тем же именем у учителя уже есть (unique_together name+teacher) — обновляем био
+    with transaction.atomic():
+        Student.objects.bulk_create(
+            list(batch.values()),
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["name", "teacher"],
+            update_fields=["bio", "updated_at"],
+        )
+    result.students += len(batch)
+    batch.clear()
+
+
+def _resolve_new(teacher, model, batch: list, result: ImportResult) -> list:
+    """Проставить ученика по имени и отбросить уже загруженные: [(номер строки, объект model)]"""
+    names = {student_name for _line_no, student_name, _lesson in batch}
+    student_ids = dict(Student.objects.filter(teacher=teacher, name__in=names).values_list("name", "id"))
+
+    resolved = []
+    for line_no, student_name, lesson in batch:
+        student_id = student_ids.get(student_name)
+        if student_id is None:
+            result.error(line_no, f"ученик «{student_name}» не найден")
+            continue
+        lesson.student_id = student_id
+        resolved.append((line_no, lesson))
+    batch.clear()
+    if not resolved:
+        return []
+
+    # Повторный импорт того же файла не должен дублировать занятия
+    existing = set(
+        model.objects.filter(
+            teacher=teacher,
+            student_id__in={lesson.student_id for _line_no, lesson in resolved},
+            start_time__gte=min(lesson.start_time for _line_no, lesson in resolved),
+            start_time__lte=max(lesson.start_time for _line_no, lesson in resolved),
+        ).values_list("student_id", "start_time")
+    )
+    fresh = []
+    for line_no, lesson in resolved:
+        key = (lesson.student_id, lesson.start_time)
+        if key not in existing:
+            existing.add(key)
+            fresh.append((line_no, lesson))
+    result.skipped += len(resolved) - len(fresh)
+    return fresh
+
+
+def _flush_archived(teacher, batch: list, result: ImportResult) -> None:
+    if not batch:
+        return
+    # Прошедшие занятия на пересечения не проверяются: это история, как она есть
+    fresh = [lesson for _line_no, lesson in _resolve_new(teacher, ArchivedLesson, batch, result)]
+    with transaction.atomic():
+        store_archived(fresh, batch_size=BATCH_SIZE)
+    result.archived += len(fresh)
+
+
+def _flush_lessons(teacher, batch: list, result: ImportResult) -> None:
+    if not batch:
+        return
+    resolved = _resolve_new(teacher, Lesson, batch, result)
+    fresh = [lesson for _line_no, lesson in resolved]
+    line_numbers = {id(lesson): line_no for line_no, lesson in resolved}
+
+    # Пересечения со старыми занятиями и внутри пачки — одним проходом
+    conflicting = set()
+    for new, other in find_batch_conflicts(teacher.id, fresh):
+        if id(new) not in conflicting:
+            conflicting.add(id(new))
+            other_time = timezone.localtime(other.start_time).strftime("%Y-%m-%d %H:%M")
+            result.error(line_numbers[id(new)], f"пересекается с занятием {other_time}")
+    fresh = [lesson for lesson in fresh if id(lesson) not in conflicting]
+    with transaction.atomic():
+        Lesson.objects.bulk_create(fresh, batch_size=BATCH_SIZE)
+    result.lessons += len(fresh)
+
+
+def _parse_lesson(record: dict, line_no: int, result: ImportResult):
+    """(имя ученика, начало, длительность) из записи занятия; None — запись с ошибкой"""
+    try:
+        start_time = parse_datetime(record.get("start_time") or "")
+    except ValueError:
+        start_time = None
+    student_name = (record.get("student") or "").strip()
+    if start_time is None or not student_name:
+        result.error(line_no, "нужны student и start_time (ISO 8601)")
+        return None
+    if timezone.is_naive(start_time):
+        start_time = timezone.make_aware(start_time, timezone.get_default_timezone())
+    try:
+        duration = int(record.get("duration_minutes") or Lesson._meta.get_field("duration_minutes").default)
+    except (TypeError, ValueError):
+        duration = 0
+    if not 1 <= duration <= Lesson.MAX_DURATION_MINUTES:
+        result.error(line_no, f"длительность должна быть от 1 до {Lesson.MAX_DURATION_MINUTES} минут")
+        return None
+    return student_name, start_time, duration
+
+
+def import_records(teacher, uploaded_file, fmt: str) -> ImportResult:
+    """Проверить и записать учеников, архив и занятия пачками по BATCH_SIZE"""
+    result = ImportResult()
+    students: dict = {}  # имя -> Student; повтор имени в одной пачке перезаписывает запись
+    archived: list = []
+    lessons: list = []
+
+    line_no = 0
+    try:
+        for line_no, record in _read_records(uploaded_file, fmt):
+            if not isinstance(record, dict):
+                result.error(line_no, "не удалось разобрать запись")
+                continue
+            kind = record.get("type")
+            if kind == "student":
+                name = (record.get("name") or "").strip()
+                if not name or len(name) > 255:
+                    result.error(line_no, "пустое или слишком длинное имя ученика")
+                    continue
+                students[name] = Student(name=name, teacher=teacher, bio=record.get("bio") or "")
+                if len(students) >= BATCH_SIZE:
+                    _flush_students(teacher, students, result)
+            elif kind in ("lesson", "archived_lesson"):
+                # Занятия ссылаются на учеников — те должны быть уже записаны
+                _flush_students(teacher, students, result)
+                parsed = _parse_lesson(record, line_no, result)
+                if parsed is None:
+                    continue
+                student_name, start_time, duration = parsed
+                if kind == "archived_lesson":
+                    lesson = ArchivedLesson(teacher=teacher, start_time=start_time, duration_minutes=duration)
+                    archived.append((line_no, student_name, lesson))
+                    if len(archived) >= BATCH_SIZE:
+                        _flush_archived(teacher, archived, result)
+                    continue
+                lesson = Lesson(
+                    teacher=teacher,
+                    start_time=start_time,
+                    duration_minutes=duration,
+                    notified_one_hour=_as_bool(record.get("notified_one_hour", False)),
+                    notified_five_minutes=_as_bool(record.get("notified_five_minutes", False)),
+                )
+                lessons.append((line_no, student_name, lesson))
+                if len(lessons) >= BATCH_SIZE:
+                    _flush_lessons(teacher, lessons, result)
+            else:
+                result.error(line_no, f"неизвестный тип записи «{kind}»")
+    except UnicodeDecodeError:
+        # Например, CSV, сохраненный Excel'ем в cp1251: остальное не читаем, прочитанное записываем
+        result.errors.append(f"Файл не в кодировке UTF-8: чтение остановлено после строки {line_no}. Сохраните файл как UTF-8")
+
+    _flush_students(teacher, students, result)
+    _flush_archived(teacher, archived, result)
+    _flush_lessons(teacher, lessons, result)
+    # Записи шли через bulk_create, без сигналов: сбрасываем кэш бота и просим дашборды перечитать занятия
+    invalidate_agenda(teacher.id)
+    publish_resync([teacher.id])
+    return result
@@ -7,8 +7,16 @@ urlpatterns = [
     path("", views.students_list, name="home"),
     path("login/", views.teacher_login, name="teacher_login"),
     path("logout/", views.teacher_logout, name="logout"),
+    path("dashboard/", views.dashboard, name="dashboard"),
+    path("dashboard/events/", views.dashboard_events, name="dashboard_events"),
+    path("dashboard/lessons/", views.dashboard_lessons, name="dashboard_lessons"),
     path("students/", views.students_list, name="students_list"),
     path("students/<int:student_id>/", views.student_detail, name="student_detail"),
     path("students/<int:student_id>/bio/pdf/", views.student_bio_pdf, name="student_bio_pdf"),
+    path("images/<int:image_id>/<str:variant>/", views.bio_image, name="bio_image"),
+    path("telegram/webhook/<str:secret>/", views.telegram_webhook, name="telegram_webhook"),
+    path("export/", views.export_data, name="export_data"),
+    path("calendar/<str:token>.ics", views.calendar_feed, name="calendar_feed"),
     path("settings/", views.settings_page, name="settings_page"),
+    path("settings/theme/", views.save_theme, name="save_theme"),
 ]
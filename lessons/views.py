@@ -1,22 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-import markdown
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib import colors
-from io import BytesIO
-import os
-import re
-
-from .forms import LessonForm, StudentForm, BioForm, LoginForm, ProfileForm, PasswordChangeForm
-from .models import Lesson, Student, Teacher
+from django.conf import settings
+from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from datetime import timedelta
+import hashlib
+import hmac
+import json
+import queue
+
+from .archive import get_rollup_stats
+from .bot import handle_update
+from .calendar_feed import feed_version, iter_calendar
+from .events import lesson_payload, subscribe, unsubscribe
+from .forms import LessonForm, StudentForm, BioForm, BioImageForm, LoginForm, ProfileForm, PasswordChangeForm, DataImportForm
+from .hashing import PasswordHasherBusy, run_hashing
+from .images import VARIANTS, get_variant
+from .models import BioImage, Lesson, Student, Teacher
+from .rendering import markdown_to_html
+from .scheduling import describe, find_batch_conflicts
+from .search import search_students
+from .throttle import client_ip, locked_for, register_failure, register_success
+from .themes import DEFAULT_THEME, THEMES, theme_urls
+from .transfer import export_csv, export_jsonl, import_records
 
 
 def get_current_teacher(request):
@@ -32,36 +41,65 @@ def get_current_teacher(request):
 
 def get_theme(request):
     """Получить текущую тему из сессии"""
-    return request.session.get('theme', 'neon')
+    theme = request.session.get('theme', DEFAULT_THEME)
+    return theme if theme in THEMES else DEFAULT_THEME
 
 
 def set_theme(request, theme):
     """Установить тему в сессию"""
-    request.session['theme'] = theme
+    request.session['theme'] = theme if theme in THEMES else DEFAULT_THEME
+
+
+@require_POST
+def save_theme(request):
+    """Сохранить тему без перерисовки страницы (вызывается из JS на странице настроек)"""
+    if not get_current_teacher(request):
+        return HttpResponse(status=403)
+    theme = request.POST.get('theme')
+    if theme not in THEMES:
+        return HttpResponse(status=400)
+    set_theme(request, theme)
+    return HttpResponse(status=204)
 
 
 def teacher_login(request):
     """Вход учителя"""
+    status = 200
     if request.method == "POST":
         form = LoginForm(request.POST)
         if form.is_valid():
             username = form.cleaned_data['username']
             password = form.cleaned_data['password']
+            ip = client_ip(request)
             
-            try:
-                teacher = Teacher.objects.get(username=username)
-                if teacher.check_password(password):
-                    request.session['teacher_id'] = teacher.id
-                    return redirect('students_list')
-                else:
-                    form.add_error('password', 'Неверный пароль')
-            except Teacher.DoesNotExist:
-                form.add_error('username', 'Учитель не найден')
+            # Заблокированные попытки отклоняем до дорогой проверки пароля
+            wait = locked_for(username, ip)
+            if wait:
+                form.add_error(None, f'Слишком много попыток входа. Повторите через {wait} сек.')
+                status = 429
+            else:
+                try:
+                    teacher = Teacher.objects.get(username=username)
+                    if run_hashing(teacher.check_password, password):
+                        register_success(username)
+                        if teacher.password_upgraded:
+                            teacher.save(update_fields=['password'])
+                        request.session['teacher_id'] = teacher.id
+                        return redirect('students_list')
+                    else:
+                        register_failure(username, ip)
+                        form.add_error('password', 'Неверный пароль')
+                except Teacher.DoesNotExist:
+                    register_failure(username, ip)
+                    form.add_error('username', 'Учитель не найден')
+                except PasswordHasherBusy:
+                    form.add_error(None, 'Сервер перегружен, попробуйте войти через несколько секунд')
+                    status = 503
     else:
         form = LoginForm()
     
     theme = get_theme(request)
-    return render(request, "lessons/login.html", {"form": form, "theme": theme})
+    return render(request, "lessons/login.html", {"form": form, "theme": theme}, status=status)
 
 
 def teacher_logout(request):
@@ -76,7 +114,11 @@ def students_list(request):
     if not teacher:
         return redirect('teacher_login')
     
-    students = Student.objects.filter(teacher=teacher)
+    query = request.GET.get('q', '').strip()
+    if query:
+        students = search_students(teacher, query)
+    else:
+        students = Student.objects.filter(teacher=teacher)
     
     if request.method == "POST":
         form = StudentForm(request.POST)
@@ -92,11 +134,75 @@ def students_list(request):
     return render(request, "lessons/students_list.html", {
         "form": form,
         "students": students,
+        "query": query,
+        "teacher": teacher,
+        "theme": theme,
+    })
+
+
+DASHBOARD_LIMIT = 200
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _upcoming_lessons(teacher) -> list[dict]:
+    # Один запрос по индексу (teacher, start_time)
+    lessons = (
+        Lesson.objects.filter(teacher=teacher, start_time__gte=timezone.now())
+        .select_related('student')
+        .order_by('start_time')[:DASHBOARD_LIMIT]
+    )
+    return [lesson_payload(lesson) for lesson in lessons]
+
+
+def dashboard(request):
+    """Ближайшие занятия по всем ученикам; дальше страница обновляется через SSE"""
+    teacher = get_current_teacher(request)
+    if not teacher:
+        return redirect('teacher_login')
+    
+    theme = get_theme(request)
+    return render(request, "lessons/dashboard.html", {
+        "lessons": _upcoming_lessons(teacher),
         "teacher": teacher,
         "theme": theme,
     })
 
 
+def dashboard_lessons(request):
+    """Свежий снимок для дашборда: после переподключения SSE или переполнения очереди событий"""
+    teacher = get_current_teacher(request)
+    if not teacher:
+        return HttpResponse(status=403)
+    return JsonResponse({"lessons": _upcoming_lessons(teacher)})
+
+
+def dashboard_events(request):
+    """SSE-поток изменений занятий учителя"""
+    teacher = get_current_teacher(request)
+    if not teacher:
+        return HttpResponse(status=403)
+    
+    def stream(teacher_id):
+        # Подписка раньше первого байта ответа: к событию open на клиенте она уже действует,
+        # и снимок, который клиент запросит после open, не пропустит изменений
+        q = subscribe(teacher_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    yield q.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Комментарий-пинг, чтобы прокси не закрывали соединение
+                    yield ": keepalive\n\n"
+        finally:
+            unsubscribe(teacher_id, q)
+    
+    response = StreamingHttpResponse(stream(teacher.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def student_detail(request, student_id):
     """Детальная страница ученика с занятиями и био"""
     teacher = get_current_teacher(request)
@@ -117,8 +223,26 @@ def student_detail(request, student_id):
                 lesson.start_time = timezone.make_aware(dt, timezone.get_default_timezone())
             lesson.notified_one_hour = False
             lesson.notified_five_minutes = False
-            lesson.save()
-            return redirect('student_detail', student_id=student_id)
+            
+            # Серия: то же время каждую неделю; вся серия проверяется на пересечения за один проход
+            series = [lesson] + [
+                Lesson(
+                    student=student,
+                    teacher=teacher,
+                    start_time=lesson.start_time + timedelta(weeks=week),
+                    duration_minutes=lesson.duration_minutes,
+                )
+                for week in range(1, (lesson_form.cleaned_data.get('repeat_weeks') or 0) + 1)
+            ]
+            conflicts = find_batch_conflicts(teacher.id, series)
+            if conflicts:
+                for new, other in conflicts[:5]:
+                    lesson_form.add_error('start_time', f"Пересекается с занятием {describe(other)}")
+            else:
+                with transaction.atomic():
+                    for item in series:
+                        item.save()
+                return redirect('student_detail', student_id=student_id)
     else:
         lesson_form = LessonForm()
         lesson_form.fields['student'].queryset = Student.objects.filter(id=student_id, teacher=teacher)
@@ -133,10 +257,26 @@ def student_detail(request, student_id):
     else:
         bio_form = BioForm(instance=student)
     
+    # Картинки к био
+    if request.method == "POST" and 'add_image' in request.POST:
+        image_form = BioImageForm(request.POST, request.FILES)
+        if image_form.is_valid():
+            bio_image = image_form.save(commit=False)
+            bio_image.student = student
+            bio_image.save()
+            return redirect('student_detail', student_id=student_id)
+    else:
+        image_form = BioImageForm()
+    
+    if request.method == "POST" and 'delete_image' in request.POST:
+        BioImage.objects.filter(id=request.POST.get('image_id'), student=student).delete()
+        return redirect('student_detail', student_id=student_id)
+    
     lessons = Lesson.objects.filter(student=student).order_by('start_time')
+    images = student.images.all()
     
     # Конвертируем MD в HTML для отображения
-    bio_html = markdown.markdown(student.bio) if student.bio else ""
+    bio_html = markdown_to_html(student.bio) if student.bio else ""
     
     theme = get_theme(request)
     return render(request, "lessons/student_detail.html", {
@@ -145,6 +285,8 @@ def student_detail(request, student_id):
         "lesson_form": lesson_form,
         "bio_form": bio_form,
         "bio_html": bio_html,
+        "images": images,
+        "image_form": image_form,
         "teacher": teacher,
         "theme": theme,
     })
@@ -158,163 +300,105 @@ def student_bio_pdf(request, student_id):
     
     student = get_object_or_404(Student, id=student_id, teacher=teacher)
     
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=72)
+    # ReportLab загружается только при первом экспорте PDF
+    from .pdf import build_bio_pdf
+
+    response = HttpResponse(build_bio_pdf(student, teacher), content_type='application/pdf')
+    # Кодируем имя файла правильно
+    filename = f"{student.name}_bio.pdf"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def bio_image(request, image_id, variant):
+    """Уменьшенная копия картинки био (создается при первом запросе, дальше отдается из кэша)"""
+    teacher = get_current_teacher(request)
+    if not teacher:
+        return redirect('teacher_login')
+    if variant not in VARIANTS:
+        raise Http404("Неизвестный размер")
     
-    # Регистрируем шрифт с поддержкой кириллицы
-    # Используем встроенный шрифт, который поддерживает кириллицу
-    # В Windows обычно есть Arial Unicode MS или используем стандартный
+    image = get_object_or_404(BioImage, id=image_id, student__teacher=teacher)
     try:
-        # Пробуем использовать системный шрифт с кириллицей
-        font_paths = [
-            'C:/Windows/Fonts/arial.ttf',
-            'C:/Windows/Fonts/arialbd.ttf',
-            '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-            '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
-        ]
-        font_registered = False
-        for font_path in font_paths:
-            if os.path.exists(font_path):
-                try:
-                    pdfmetrics.registerFont(TTFont('CyrillicFont', font_path))
-                    pdfmetrics.registerFont(TTFont('CyrillicFontBold', font_path.replace('.ttf', 'bd.ttf').replace('-Regular.ttf', '-Bold.ttf')))
-                    font_registered = True
-                    break
-                except:
-                    continue
-    except:
-        pass
-    
-    # Если шрифт не найден, используем стандартный подход с HTML-тегами
-    if not font_registered:
-        # Используем встроенные шрифты ReportLab
-        font_name = 'Helvetica'
-        font_name_bold = 'Helvetica-Bold'
-    else:
-        font_name = 'CyrillicFont'
-        font_name_bold = 'CyrillicFontBold'
-    
-    # Создаем стили с поддержкой кириллицы
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        fontName=font_name_bold,
-        fontSize=22,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        leading=26
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        fontName=font_name,
-        fontSize=12,
-        textColor=colors.HexColor('#666666'),
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        leading=14
-    )
-    
-    content_style = ParagraphStyle(
-        'CustomContent',
-        fontName=font_name,
-        fontSize=11,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=12,
-        alignment=TA_JUSTIFY,
-        leading=16,
-        leftIndent=0,
-        rightIndent=0
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        fontName=font_name_bold,
-        fontSize=14,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=12,
-        spaceBefore=16,
-        alignment=TA_LEFT,
-        leading=18
-    )
-    
-    story = []
-    
-    # Заголовок
-    title_text = student.name.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-    story.append(Paragraph(title_text, title_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    # Информация об учителе
-    teacher_text = f"Учитель: {teacher.username}".replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-    story.append(Paragraph(teacher_text, subtitle_style))
-    story.append(Spacer(1, 0.3*inch))
+        path = get_variant(image, variant)
+    except FileNotFoundError:
+        raise Http404("Файл картинки не найден")
+    response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+    # Картинка по id не меняется (новая загрузка = новый id), поэтому кэшируем надолго
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+def export_data(request):
+    """Потоковая выгрузка учеников и занятий учителя (JSON Lines или CSV)"""
+    teacher = get_current_teacher(request)
+    if not teacher:
+        return redirect('teacher_login')
     
-    # Контент био
-    if student.bio:
-        # Конвертируем MD в HTML
-        html_content = markdown.markdown(student.bio, extensions=['nl2br', 'fenced_code'])
-        
-        # Обрабатываем HTML для ReportLab Paragraph
-        # Разбиваем на параграфы
-        paragraphs = re.split(r'<p>|</p>|<br\s*/?>', html_content)
-        
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-            
-            # Обрабатываем заголовки
-            if para.startswith('<h1>'):
-                text = re.sub(r'<h1>(.*?)</h1>', r'\1', para)
-                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                story.append(Paragraph(text, heading_style))
-            elif para.startswith('<h2>'):
-                text = re.sub(r'<h2>(.*?)</h2>', r'\1', para)
-                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                story.append(Paragraph(text, heading_style))
-            elif para.startswith('<h3>'):
-                text = re.sub(r'<h3>(.*?)</h3>', r'\1', para)
-                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                story.append(Paragraph(text, heading_style))
-            elif para.startswith('<ul>') or para.startswith('<ol>'):
-                # Обрабатываем списки
-                items = re.findall(r'<li>(.*?)</li>', para)
-                for item in items:
-                    text = item.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    story.append(Paragraph(f"• {text}", content_style))
-            elif para.startswith('<code>') or para.startswith('<pre>'):
-                # Код пропускаем или обрабатываем отдельно
-                text = re.sub(r'<code>(.*?)</code>', r'\1', para)
-                text = re.sub(r'<pre>(.*?)</pre>', r'\1', text, flags=re.DOTALL)
-                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                story.append(Paragraph(text, content_style))
-            else:
-                # Обычный текст
-                # Убираем HTML теги, но сохраняем сущности
-                text = re.sub(r'<[^>]+>', '', para)
-                text = text.replace('&nbsp;', ' ')
-                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                if text.strip():
-                    story.append(Paragraph(text, content_style))
+    if request.GET.get('format') == 'csv':
+        response = StreamingHttpResponse(export_csv(teacher), content_type='text/csv; charset=utf-8')
+        filename = f"{teacher.username}_data.csv"
     else:
-        empty_text = "Биография не заполнена".replace('&', '&amp;')
-        story.append(Paragraph(empty_text, content_style))
-    
-    doc.build(story)
-    
-    buffer.seek(0)
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    # Кодируем имя файла правильно
-    filename = f"{student.name}_bio.pdf"
+        response = StreamingHttpResponse(export_jsonl(teacher), content_type='application/x-ndjson; charset=utf-8')
+        filename = f"{teacher.username}_data.jsonl"
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
+def _calendar_version(request, token):
+    # Считается один раз на запрос
+    if not hasattr(request, '_calendar_version'):
+        teacher = Teacher.objects.filter(calendar_token=token).values_list('id', 'username').first()
+        if teacher is None:
+            request._calendar_version = (None, None, (None, 0))
+        else:
+            request._calendar_version = (teacher[0], teacher[1], feed_version(teacher[0]))
+    return request._calendar_version
+
+
+def _calendar_etag(request, token):
+    teacher_id, username, (last_modified, count) = _calendar_version(request, token)
+    if teacher_id is None:
+        return None
+    stamp = last_modified.timestamp() if last_modified else 0
+    # Имя учителя попадает в X-WR-CALNAME, поэтому переименование тоже новая версия
+    name_hash = hashlib.sha1(username.encode()).hexdigest()[:12]
+    return f"{teacher_id}-{stamp}-{count}-{name_hash}"
+
+
+# Только ETag: удаление и архивация не двигают Max(updated_at), и клиент с одним If-Modified-Since
+# получал бы 304 на устаревшую ленту; число занятий в ETag такие изменения замечает
+@condition(etag_func=_calendar_etag)
+def calendar_feed(request, token):
+    """Подписка на занятия учителя в формате iCalendar; без изменений клиент получает 304"""
+    teacher = get_object_or_404(Teacher, calendar_token=token)
+    response = StreamingHttpResponse(iter_calendar(teacher), content_type='text/calendar; charset=utf-8')
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def telegram_webhook(request, secret):
+    """Webhook для команд бота (/today, /week, /next)"""
+    expected = settings.TELEGRAM_WEBHOOK_SECRET.encode()
+    header = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '').encode()
+    # Сравниваем байты: compare_digest на str с не-ASCII символами бросает TypeError
+    if not expected or not hmac.compare_digest(secret.encode(), expected) or not hmac.compare_digest(header, expected):
+        return HttpResponse(status=403)
+    
+    try:
+        update = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
+    result = handle_update(update)
+    if result is None:
+        return HttpResponse("ok")
+    # Ответ прямо в теле webhook'а: Bot API выполнит sendMessage без отдельного запроса от нас
+    chat_id, reply = result
+    return JsonResponse({"method": "sendMessage", "chat_id": chat_id, "text": reply})
+
+
 def settings_page(request):
     """Страница настроек"""
     teacher = get_current_teacher(request)
@@ -329,6 +413,16 @@ def settings_page(request):
         set_theme(request, theme)
         return HttpResponseRedirect(reverse('settings_page') + '?tab=themes')
     
+    # Импорт учеников и занятий
+    import_form = DataImportForm()
+    import_result = None
+    if request.method == "POST" and 'import_data' in request.POST:
+        import_form = DataImportForm(request.POST, request.FILES)
+        if import_form.is_valid():
+            uploaded = import_form.cleaned_data['file']
+            fmt = 'csv' if uploaded.name.lower().endswith('.csv') else 'jsonl'
+            import_result = import_records(teacher, uploaded, fmt)
+    
     # Обработка формы аккаунта (username и telegram_chat_id)
     profile_form = None
     password_form = None
@@ -339,12 +433,19 @@ def settings_page(request):
             if profile_form.is_valid():
                 profile_form.save()
                 return HttpResponseRedirect(reverse('settings_page') + '?tab=account')
+        elif 'regenerate_calendar' in request.POST:
+            teacher.regenerate_calendar_token()
+            return HttpResponseRedirect(reverse('settings_page') + '?tab=account')
         elif 'change_password' in request.POST:
             password_form = PasswordChangeForm(request.POST)
             if password_form.is_valid():
-                teacher.set_password(password_form.cleaned_data['new_password'])
-                teacher.save()
-                return HttpResponseRedirect(reverse('settings_page') + '?tab=account')
+                try:
+                    run_hashing(teacher.set_password, password_form.cleaned_data['new_password'])
+                except PasswordHasherBusy:
+                    password_form.add_error(None, 'Сервер перегружен, попробуйте еще раз через несколько секунд')
+                else:
+                    teacher.save()
+                    return HttpResponseRedirect(reverse('settings_page') + '?tab=account')
     else:
         profile_form = ProfileForm(instance=teacher)
         password_form = PasswordChangeForm()
@@ -358,10 +459,21 @@ def settings_page(request):
             from pathlib import Path
             about_file = Path(__file__).parent.parent / 'templates' / 'lessons' / 'about_project.md'
             if about_file.exists():
-                about_content = markdown.markdown(about_file.read_text(encoding='utf-8'))
+                about_content = markdown_to_html(about_file.read_text(encoding='utf-8'))
         except Exception:
             about_content = "<p>Информация о проекте загружается...</p>"
     
+    # Статистика читается из готовых строк LessonRollup, без агрегации по истории
+    stats = None
+    if tab == 'stats':
+        rollups = get_rollup_stats(teacher)
+        students = Student.objects.filter(teacher=teacher).only('id', 'name')
+        empty = {"week": 0, "month": 0, "total": 0}
+        stats = {
+            "teacher": rollups["teacher"],
+            "students": [(s.name, rollups["students"].get(s.id, empty)) for s in students],
+        }
+    
     return render(request, "lessons/settings.html", {
         "teacher": teacher,
         "profile_form": profile_form,
@@ -369,4 +481,9 @@ def settings_page(request):
         "active_tab": tab,
         "theme": theme,
         "about_content": about_content,
+        "stats": stats,
+        "import_form": import_form,
+        "import_result": import_result,
+        "theme_urls": theme_urls(),
+        "calendar_url": request.build_absolute_uri(reverse('calendar_feed', args=[teacher.calendar_token])) if teacher.calendar_token else "",
     })